@@ -3,69 +3,152 @@ Configuration management for Vision Agent.
 Loads settings from environment variables with sensible defaults.
 """
 
+import functools
+import json
 import os
+from dataclasses import dataclass
 from pathlib import Path
-from dotenv import load_dotenv
+from dotenv import load_dotenv, dotenv_values
 
-# Load .env file if it exists
-load_dotenv()
+# Resolved once so every derived path is absolute and callers never need resolve()
+_BASE_DIR = Path(__file__).resolve().parent
 
 
-class Config:
-    """Central configuration class for Vision Agent."""
+def _load_env_cached():
+    """
+    Load .env through a parsed-values cache keyed by the file's mtime.
     
-    # Paths
-    BASE_DIR = Path(__file__).parent
-    USER_DATA_DIR = BASE_DIR / "user_data"
-    SCREENSHOTS_DIR = BASE_DIR / "screenshots"
+    Opt-in with VISION_AGENT_ENV_CACHE=1. A fresh cache costs two stats and a
+    small JSON read instead of re-parsing .env. Like load_dotenv(), existing
+    environment variables are never overridden.
+    """
+    env_path = _BASE_DIR / ".env"
+    cache_path = _BASE_DIR / ".env.cache.json"
     
-    # OpenAI (strip whitespace to avoid header issues)
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
-    OPENAI_MODEL = "gpt-4o-mini"  # Cost-effective vision model
+    if not env_path.exists():
+        # Nothing to cache; drop any stale snapshot
+        cache_path.unlink(missing_ok=True)
+        return
     
-    # Browser settings
-    HEADLESS = os.getenv("HEADLESS", "false").lower() == "true"
+    values = None
+    try:
+        if cache_path.stat().st_mtime >= env_path.stat().st_mtime:
+            values = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        values = None
     
-    # Automation limits
-    MAX_STEPS = int(os.getenv("MAX_STEPS", "30"))
-    ACTION_DELAY = float(os.getenv("ACTION_DELAY", "1.0"))
+    if values is None:
+        values = {k: v for k, v in dotenv_values(env_path).items() if v is not None}
+        try:
+            cache_path.write_text(json.dumps(values), encoding="utf-8")
+        except OSError:
+            pass
     
+    for key, value in values.items():
+        os.environ.setdefault(key, value)
+
+
+# Load .env file if it exists (once per process tree - children inherit os.environ)
+if os.environ.get("VISION_AGENT_ENV_LOADED") != "1":
+    if os.environ.get("VISION_AGENT_ENV_CACHE") == "1":
+        _load_env_cached()
+    else:
+        load_dotenv()
+    os.environ["VISION_AGENT_ENV_LOADED"] = "1"
+
+
+@dataclass(frozen=True, slots=True)
+class _Config:
+    """Central configuration for Vision Agent, resolved once from the environment."""
+
+    # Paths
+    BASE_DIR: Path
+    USER_DATA_DIR: Path
+    SCREENSHOTS_DIR: Path
+    DEFAULT_USER_DATA_PATH: Path
+    DEFAULT_RESUME_PATH: Path
+    DEFAULT_COVER_LETTER_PATH: Path
+    RESPONSE_CACHE_PATH: Path
+    ACTION_CACHE_PATH: Path
+
+    # OpenAI
+    OPENAI_API_KEY: str
+    OPENAI_MODEL: str
+
+    # Browser settings
+    HEADLESS: bool
+
+    # Automation limits
+    MAX_STEPS: int
+    ACTION_DELAY: float
+
     # Image processing (lower resolution = lower token cost)
-    SCREENSHOT_WIDTH = int(os.getenv("SCREENSHOT_WIDTH", "1024"))
-    
+    SCREENSHOT_WIDTH: int
+    SCREENSHOT_FORMAT: str  # "webp" (smaller uploads) or "jpeg" (fallback)
+
     # Set-of-Mark
-    ENABLE_SOM = os.getenv("ENABLE_SOM", "false").lower() == "true"
-    
-    @classmethod
-    def validate(cls) -> bool:
+    ENABLE_SOM: bool
+
+    def validate(self) -> bool:
         """Validate that required configuration is present."""
         errors = []
-        
-        if not cls.OPENAI_API_KEY:
+
+        if not self.OPENAI_API_KEY:
             errors.append("OPENAI_API_KEY is required. Set it in .env file.")
-        
+
         if errors:
             for error in errors:
                 print(f"❌ Config Error: {error}")
             return False
-        
+
         return True
-    
-    @classmethod
-    def ensure_directories(cls):
+
+    def ensure_directories(self):
         """Create required directories if they don't exist."""
-        cls.USER_DATA_DIR.mkdir(exist_ok=True)
-        cls.SCREENSHOTS_DIR.mkdir(exist_ok=True)
-    
-    @classmethod
-    def get_default_user_data_path(cls) -> Path:
+        for directory in (self.USER_DATA_DIR, self.SCREENSHOTS_DIR):
+            # Cheap predicate first; mkdir on an existing dir raises and re-stats
+            if not os.path.isdir(directory):
+                directory.mkdir(exist_ok=True)
+
+    def get_default_user_data_path(self) -> Path:
         """Get the default user.json path."""
-        return cls.USER_DATA_DIR / "user.json"
-    
-    @classmethod
-    def get_default_resume_path(cls) -> Path:
+        return self.DEFAULT_USER_DATA_PATH
+
+    def get_default_resume_path(self) -> Path:
         """Get the default resume path."""
-        return cls.USER_DATA_DIR / "resume.pdf"
+        return self.DEFAULT_RESUME_PATH
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config() -> _Config:
+    """Read the environment once and build the shared configuration."""
+    env = os.environ
+    base_dir = _BASE_DIR
+
+    user_data_dir = base_dir / "user_data"
+
+    return _Config(
+        BASE_DIR=base_dir,
+        USER_DATA_DIR=user_data_dir,
+        SCREENSHOTS_DIR=base_dir / "screenshots",
+        DEFAULT_USER_DATA_PATH=user_data_dir / "user.json",
+        DEFAULT_RESUME_PATH=user_data_dir / "resume.pdf",
+        DEFAULT_COVER_LETTER_PATH=user_data_dir / "coverletter.txt",
+        RESPONSE_CACHE_PATH=base_dir / ".cache" / "responses.sqlite",
+        ACTION_CACHE_PATH=base_dir / ".cache" / "actions.sqlite",
+        # Strip whitespace to avoid header issues
+        OPENAI_API_KEY=env.get("OPENAI_API_KEY", "").strip(),
+        OPENAI_MODEL="gpt-4o-mini",  # Cost-effective vision model
+        HEADLESS=env.get("HEADLESS", "false").lower() == "true",
+        MAX_STEPS=int(env.get("MAX_STEPS", "30")),
+        ACTION_DELAY=float(env.get("ACTION_DELAY", "1.0")),
+        SCREENSHOT_WIDTH=int(env.get("SCREENSHOT_WIDTH", "1024")),
+        SCREENSHOT_FORMAT=env.get("SCREENSHOT_FORMAT", "webp").lower(),
+        ENABLE_SOM=env.get("ENABLE_SOM", "false").lower() == "true",
+    )
+
+
+Config = _load_config()
 
 
 if __name__ == "__main__":
@@ -6,23 +6,20 @@ Main entry point with CLI interface.
 Usage:
     python main.py --url "https://jobs.lever.co/company/apply"
     python main.py --url "URL" --som  # Enable Set-of-Mark for complex UIs
+    python main.py --url "URL1" --url "URL2" --concurrency 2  # Several applications at once
 """
 
+import os
 import sys
 from pathlib import Path
 
 import click
-from rich.console import Console
-from rich.panel import Panel
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import Config
-from src.vision_agent import VisionAgent
-from src.utils import load_user_data, ensure_directories
-
-console = Console()
+from src._console import console
 
 
 def print_banner():
@@ -39,11 +36,34 @@ def print_banner():
     console.print(banner, style="bold blue")
 
 
+def scan_user_data_dir() -> dict:
+    """
+    List the default user_data directory in a single directory read.
+    
+    Returns:
+        Mapping of file name to os.DirEntry (empty if the directory is missing)
+    """
+    try:
+        with os.scandir(Config.USER_DATA_DIR) as it:
+            return {entry.name: entry for entry in it}
+    except OSError:
+        return {}
+
+
+def file_exists(path: Path, user_data_entries: dict) -> bool:
+    """Check a path, answering from the user_data scan when it lives there."""
+    if path.parent == Config.USER_DATA_DIR:
+        entry = user_data_entries.get(path.name)
+        return entry is not None and entry.is_file()
+    return os.path.exists(path)
+
+
 @click.command()
 @click.option(
     '--url', '-u',
     required=True,
-    help='Job application URL to fill'
+    multiple=True,
+    help='Job application URL to fill (repeat to fill several concurrently)'
 )
 @click.option(
     '--user-data', '-d',
@@ -77,20 +97,62 @@ def print_banner():
     '--delay',
     default=1.0,
     type=float,
-    help='Delay between actions in seconds (default: 1.0)'
+    help='Max seconds to wait for the page to settle between steps (default: 1.0)'
+)
+@click.option(
+    '--detail',
+    type=click.Choice(['auto', 'low', 'high']),
+    default='auto',
+    help='Screenshot detail sent to the model (auto: low for screenshots up to 768px wide)'
 )
 @click.option(
     '--cover-letter', '-c',
     default=None,
     help='Path to cover letter text file (default: user_data/coverletter.txt)'
 )
+@click.option(
+    '--tools', '-t',
+    is_flag=True,
+    default=False,
+    help='Let the model fetch user data sections via tool calls instead of sending the whole profile'
+)
+@click.option(
+    '--cache',
+    is_flag=True,
+    default=False,
+    help='Reuse cached analysis responses for identical requests (development/replays)'
+)
+@click.option(
+    '--action-cache',
+    is_flag=True,
+    default=False,
+    help='Reuse actions that succeeded on the same page state in earlier runs'
+)
+@click.option(
+    '--save-screenshots',
+    is_flag=True,
+    default=False,
+    help='Save every step screenshot to the screenshots folder (debugging)'
+)
+@click.option(
+    '--concurrency',
+    default=2,
+    type=click.IntRange(min=1),
+    help='Applications filled at the same time when several URLs are given (default: 2)'
+)
+@click.option(
+    '--quiet', '-q',
+    is_flag=True,
+    default=False,
+    help='Print one summary per batch of field actions instead of a line per action'
+)
 @click.option(
     '--yes', '-y',
     is_flag=True,
     default=False,
     help='Skip the start confirmation prompt (run fully unattended)'
 )
-def main(url: str, user_data: str, resume: str, som: bool, headless: bool, max_steps: int, delay: float, cover_letter: str, yes: bool):
+def main(url: tuple, user_data: str, resume: str, som: bool, headless: bool, max_steps: int, delay: float, detail: str, cover_letter: str, tools: bool, cache: bool, action_cache: bool, save_screenshots: bool, concurrency: int, quiet: bool, yes: bool):
     """
     Automatically fill job applications using AI vision.
     
@@ -108,19 +170,27 @@ def main(url: str, user_data: str, resume: str, som: bool, headless: bool, max_s
         console.print("[dim]Copy .env.example to .env and add your API key[/dim]")
         sys.exit(1)
     
+    # Heavy imports (Playwright, OpenAI, PIL) are deferred so --help stays fast
+    from rich.panel import Panel
+    from src.utils import load_user_data
+    from src.vision_agent import VisionAgent, run_agents
+    
     # Resolve paths
-    user_data_path = Path(user_data) if user_data else Config.get_default_user_data_path()
-    resume_path = Path(resume) if resume else Config.get_default_resume_path()
-    cover_letter_path = Path(cover_letter) if cover_letter else Config.USER_DATA_DIR / "coverletter.txt"
+    user_data_path = Path(user_data) if user_data else Config.DEFAULT_USER_DATA_PATH
+    resume_path = Path(resume) if resume else Config.DEFAULT_RESUME_PATH
+    cover_letter_path = Path(cover_letter) if cover_letter else Config.DEFAULT_COVER_LETTER_PATH
+    
+    # One scandir covers all three checks for the default locations
+    user_data_entries = scan_user_data_dir()
     
     # Validate user data exists
-    if not user_data_path.exists():
+    if not file_exists(user_data_path, user_data_entries):
         console.print(f"\n[bold red]User data not found: {user_data_path}[/bold red]")
         console.print("[dim]Edit user_data/user.json with your information[/dim]")
         sys.exit(1)
     
     # Validate resume exists (warning only, some applications don't require it)
-    if not resume_path.exists():
+    if not file_exists(resume_path, user_data_entries):
         console.print(f"\n[yellow]⚠ Resume not found: {resume_path}[/yellow]")
         console.print("[dim]Some applications may require a resume upload[/dim]")
     
@@ -129,16 +199,29 @@ def main(url: str, user_data: str, resume: str, som: bool, headless: bool, max_s
     if not loaded_data:
         sys.exit(1)
     
+    cover_letter_exists = file_exists(cover_letter_path, user_data_entries)
+    
+    # Each URL is filled once, even if repeated on the command line
+    unique_urls = tuple(dict.fromkeys(url))
+    if len(unique_urls) < len(url):
+        console.print(f"[yellow]⚠ Ignoring {len(url) - len(unique_urls)} duplicate URL(s)[/yellow]")
+        url = unique_urls
+    
     # Print configuration summary
     console.print(Panel(
-        f"[bold]URL:[/bold] {url}\n"
+        f"[bold]URL:[/bold] {', '.join(url)}\n"
         f"[bold]User Data:[/bold] {user_data_path}\n"
         f"[bold]Resume:[/bold] {resume_path}\n"
-        f"[bold]Cover Letter:[/bold] {cover_letter_path if cover_letter_path.exists() else 'Not found'}\n"
+        f"[bold]Cover Letter:[/bold] {cover_letter_path if cover_letter_exists else 'Not found'}\n"
         f"[bold]Set-of-Mark:[/bold] {'Enabled' if som or Config.ENABLE_SOM else 'Disabled'}\n"
+        f"[bold]User Data Tools:[/bold] {'Enabled' if tools else 'Disabled'}\n"
+        f"[bold]Response Cache:[/bold] {Config.RESPONSE_CACHE_PATH if cache else 'Disabled'}\n"
+        f"[bold]Action Cache:[/bold] {Config.ACTION_CACHE_PATH if action_cache else 'Disabled'}\n"
         f"[bold]Headless:[/bold] {'Yes' if headless or Config.HEADLESS else 'No'}\n"
         f"[bold]Max Steps:[/bold] {max_steps}\n"
-        f"[bold]Action Delay:[/bold] {delay}s",
+        f"[bold]Action Delay:[/bold] {delay}s\n"
+        f"[bold]Image Detail:[/bold] {detail}"
+        + (f"\n[bold]Concurrency:[/bold] {concurrency}" if len(url) > 1 else ""),
         title="Configuration",
         border_style="cyan"
     ))
@@ -149,28 +232,51 @@ def main(url: str, user_data: str, resume: str, som: bool, headless: bool, max_s
         console.print("[dim]Cancelled by user[/dim]")
         sys.exit(0)
     
-    # Initialize and run the agent
+    agent_kwargs = dict(
+        user_data_path=user_data_path,
+        resume_path=resume_path,
+        api_key=Config.OPENAI_API_KEY,
+        headless=headless or Config.HEADLESS,
+        max_steps=max_steps,
+        action_delay=delay,
+        screenshot_width=Config.SCREENSHOT_WIDTH,
+        screenshot_format=Config.SCREENSHOT_FORMAT,
+        image_detail=detail,
+        enable_som=som or Config.ENABLE_SOM,
+        cover_letter_path=cover_letter_path if cover_letter_exists else None,
+        use_tools=tools,
+        response_cache_path=Config.RESPONSE_CACHE_PATH if cache else None,
+        action_cache_path=Config.ACTION_CACHE_PATH if action_cache else None,
+        save_screenshots=save_screenshots,
+        verbose=not quiet
+    )
+    
+    # Initialize and run the agent (one per URL, concurrently, for batches)
     try:
-        agent = VisionAgent(
-            user_data_path=user_data_path,
-            resume_path=resume_path,
-            api_key=Config.OPENAI_API_KEY,
-            headless=headless or Config.HEADLESS,
-            max_steps=max_steps,
-            action_delay=delay,
-            screenshot_width=Config.SCREENSHOT_WIDTH,
-            enable_som=som or Config.ENABLE_SOM,
-            cover_letter_path=cover_letter_path if cover_letter_path.exists() else None
-        )
-        
-        success = agent.run(url)
+        if len(url) > 1:
+            results = run_agents(list(url), concurrency=concurrency, **agent_kwargs)
+            for job_url, job_success in results.items():
+                if job_success:
+                    console.print(f"[green]✓ {job_url}[/green]")
+                else:
+                    console.print(f"[yellow]⚠ {job_url}[/yellow]")
+            success = all(results.values())
+        else:
+            agent = VisionAgent(**agent_kwargs)
+            try:
+                success = agent.run(url[0])
+            finally:
+                agent.close()
         
         if success:
             console.print("\n[bold green]🎉 Job application completed successfully![/bold green]")
             sys.exit(0)
         else:
             console.print("\n[bold yellow]⚠ Automation ended without confirmation of submission[/bold yellow]")
-            console.print("[dim]Check screenshots folder for the final state[/dim]")
+            if save_screenshots:
+                console.print("[dim]Check screenshots folder for the final state[/dim]")
+            else:
+                console.print("[dim]Re-run with --save-screenshots to keep each step's screenshot[/dim]")
             sys.exit(1)
             
     except KeyboardInterrupt:
@@ -3,8 +3,17 @@ Vision Agent - Automatic Job Application Filler
 A multimodal AI agent that uses GPT-4o vision to fill job applications.
 """
 
-from .vision_agent import VisionAgent
-from .element_marker import ElementMarker
-
 __version__ = "1.0.0"
 __all__ = ["VisionAgent", "ElementMarker"]
+
+
+def __getattr__(name):
+    # Resolve exports lazily so importing a light submodule (e.g. src._console)
+    # does not pull in Playwright, OpenAI and PIL
+    if name == "VisionAgent":
+        from .vision_agent import VisionAgent
+        return VisionAgent
+    if name == "ElementMarker":
+        from .element_marker import ElementMarker
+        return ElementMarker
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
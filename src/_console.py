@@ -0,0 +1,27 @@
+"""
+Shared Rich console for Vision Agent.
+A single instance avoids repeating terminal detection in every module; it is
+created (and rich imported) on first use, so code paths that never print skip
+the import entirely.
+"""
+
+_console = None
+
+
+def get_console():
+    """Return the shared Console, creating it on first call."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+class _LazyConsole:
+    """Stand-in that forwards attribute access to the shared Console."""
+    
+    def __getattr__(self, name):
+        return getattr(get_console(), name)
+
+
+console = _LazyConsole()
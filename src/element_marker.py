@@ -4,10 +4,11 @@ Injects JavaScript to overlay numbered markers on interactive elements.
 This enables 100% accurate element targeting by referencing numbers instead of selectors.
 """
 
+import json
+
 from playwright.sync_api import Page
-from rich.console import Console
 
-console = Console()
+from ._console import console
 
 
 class ElementMarker:
@@ -18,56 +19,126 @@ class ElementMarker:
     allowing the AI to reference elements by their number ID.
     """
     
+    # Interactive element selectors, joined once instead of on every injection
+    INTERACTIVE_SELECTORS = ", ".join([
+        'input:not([type="hidden"])',
+        'textarea',
+        'select',
+        'button',
+        '[role="button"]',
+        '[role="checkbox"]',
+        '[role="radio"]',
+        '[role="combobox"]',
+        '[role="listbox"]',
+        '[role="menuitem"]',
+        '[role="option"]',
+        '[role="switch"]',
+        '[role="tab"]',
+        'a[href]',
+        '[onclick]',
+        '[contenteditable="true"]',
+        'label[for]',
+        '[tabindex]:not([tabindex="-1"])',
+    ])
+    
+    # Attributes that can make an element start or stop matching the selectors
+    WATCHED_ATTRIBUTES = ['type', 'role', 'href', 'onclick', 'contenteditable', 'for', 'tabindex']
+    
+    # JavaScript that keeps the interactive candidate list up to date. The first
+    # call scans the whole document and starts a MutationObserver; later calls
+    # only query the subtrees added (or elements re-attributed) since then.
+    CANDIDATES_SCRIPT = """
+    (() => {
+        const SELECTORS = %s;
+        const WATCHED = %s;
+        const touched = new Set();
+        let ordered = null;
+        
+        const record = records => {
+            for (const m of records) {
+                if (m.type === 'attributes') touched.add(m.target);
+                else m.addedNodes.forEach(n => { if (n.nodeType === 1) touched.add(n); });
+            }
+        };
+        const observer = new MutationObserver(record);
+        
+        window.__visionAgentCandidates = () => {
+            if (ordered === null) {
+                ordered = Array.from(document.querySelectorAll(SELECTORS));
+                observer.observe(document, {
+                    childList: true, subtree: true,
+                    attributes: true, attributeFilter: WATCHED
+                });
+                return ordered;
+            }
+            
+            // Pick up mutations whose callback has not run yet
+            record(observer.takeRecords());
+            
+            // Drop detached elements and ones that no longer match
+            ordered = ordered.filter(el => el.isConnected && el.matches(SELECTORS));
+            
+            if (touched.size) {
+                const known = new Set(ordered);
+                const add = el => { if (!known.has(el)) { known.add(el); ordered.push(el); } };
+                touched.forEach(root => {
+                    if (!root.isConnected) return;
+                    if (root.matches(SELECTORS)) add(root);
+                    root.querySelectorAll(SELECTORS).forEach(add);
+                });
+                touched.clear();
+                // Keep marker ids in document order, as a full scan would
+                ordered.sort((a, b) =>
+                    a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING ? -1 : 1);
+            }
+            return ordered;
+        };
+    })();
+    """ % (json.dumps(INTERACTIVE_SELECTORS), json.dumps(WATCHED_ATTRIBUTES))
+    
     # JavaScript to inject markers onto interactive elements
     MARKER_INJECTION_SCRIPT = """
     () => {
         // Remove any existing markers first
         document.querySelectorAll('.vision-agent-marker').forEach(el => el.remove());
+        window.__visionAgentRegistry = new Map();
         
-        // Find all interactive elements
-        const interactiveSelectors = [
-            'input:not([type="hidden"])',
-            'textarea',
-            'select',
-            'button',
-            '[role="button"]',
-            '[role="checkbox"]',
-            '[role="radio"]',
-            '[role="combobox"]',
-            '[role="listbox"]',
-            '[role="menuitem"]',
-            '[role="option"]',
-            '[role="switch"]',
-            '[role="tab"]',
-            'a[href]',
-            '[onclick]',
-            '[contenteditable="true"]',
-            'label[for]',
-            '[tabindex]:not([tabindex="-1"])'
-        ];
+        // Interactive candidates, maintained incrementally between injections
+        const elements = window.__visionAgentCandidates();
+        const viewportWidth = window.innerWidth;
+        const viewportHeight = window.innerHeight;
         
-        const elements = document.querySelectorAll(interactiveSelectors.join(', '));
-        const markers = [];
-        let idCounter = 1;
-        
-        elements.forEach((el, index) => {
+        // Phase 1 (read): collect geometry and visibility without touching the DOM,
+        // so the browser performs a single layout pass for all candidates
+        const visible = [];
+        elements.forEach(el => {
             // Skip hidden or zero-size elements
             const rect = el.getBoundingClientRect();
             if (rect.width === 0 || rect.height === 0) return;
-            if (window.getComputedStyle(el).display === 'none') return;
-            if (window.getComputedStyle(el).visibility === 'hidden') return;
             
             // Skip elements outside viewport
-            if (rect.bottom < 0 || rect.top > window.innerHeight) return;
-            if (rect.right < 0 || rect.left > window.innerWidth) return;
+            if (rect.bottom < 0 || rect.top > viewportHeight) return;
+            if (rect.right < 0 || rect.left > viewportWidth) return;
+            
+            const style = window.getComputedStyle(el);
+            if (style.display === 'none' || style.visibility === 'hidden') return;
             
+            visible.push({ el, rect });
+        });
+        
+        // Phase 2 (write): build every marker off-document and attach them at once
+        const fragment = document.createDocumentFragment();
+        const markers = [];
+        let idCounter = 1;
+        
+        visible.forEach(({ el, rect }) => {
             // Create marker container
             const marker = document.createElement('div');
             marker.className = 'vision-agent-marker';
             marker.setAttribute('data-element-id', idCounter);
             
-            // Store reference to original element
-            el.setAttribute('data-vision-agent-id', idCounter);
+            // Store reference to original element (O(1) lookup by id later)
+            window.__visionAgentRegistry.set(idCounter, el);
             
             // Style the marker (red box with number)
             marker.style.cssText = `
@@ -101,29 +172,21 @@ class ElementMarker:
             `;
             
             marker.appendChild(label);
-            document.body.appendChild(marker);
+            fragment.appendChild(marker);
             
+            // Compact summary only; full metadata is fetched on demand
             markers.push({
                 id: idCounter,
-                tagName: el.tagName.toLowerCase(),
-                type: el.type || null,
-                name: el.name || null,
-                placeholder: el.placeholder || null,
-                ariaLabel: el.getAttribute('aria-label') || null,
-                innerText: el.innerText?.substring(0, 50) || null,
-                rect: {
-                    x: rect.left,
-                    y: rect.top,
-                    width: rect.width,
-                    height: rect.height,
-                    centerX: rect.left + rect.width / 2,
-                    centerY: rect.top + rect.height / 2
-                }
+                tag: el.tagName.toLowerCase(),
+                cx: rect.left + rect.width / 2,
+                cy: rect.top + rect.height / 2
             });
             
             idCounter++;
         });
         
+        document.body.appendChild(fragment);
+        
         return markers;
     }
     """
@@ -131,18 +194,17 @@ class ElementMarker:
     # JavaScript to remove all markers
     MARKER_REMOVAL_SCRIPT = """
     () => {
+        // Only the overlays go; the id registry stays valid until the next
+        // injection so actions chosen from the marked screenshot still resolve
         document.querySelectorAll('.vision-agent-marker').forEach(el => el.remove());
-        document.querySelectorAll('[data-vision-agent-id]').forEach(el => {
-            el.removeAttribute('data-vision-agent-id');
-        });
     }
     """
     
     # JavaScript to get element by marker ID
     GET_ELEMENT_SCRIPT = """
     (id) => {
-        const el = document.querySelector(`[data-vision-agent-id="${id}"]`);
-        if (!el) return null;
+        const el = window.__visionAgentRegistry?.get(Number(id));
+        if (!el || !el.isConnected) return null;
         
         const rect = el.getBoundingClientRect();
         return {
@@ -162,26 +224,112 @@ class ElementMarker:
     }
     """
     
+    # JavaScript to describe marked elements in full (lazy counterpart to the
+    # compact summary returned by the injection script)
+    DESCRIBE_ELEMENTS_SCRIPT = """
+    (ids) => ids.map(id => {
+        const el = window.__visionAgentRegistry?.get(Number(id));
+        if (!el || !el.isConnected) return null;
+        return {
+            id: Number(id),
+            tagName: el.tagName.toLowerCase(),
+            type: el.type || null,
+            name: el.name || null,
+            placeholder: el.placeholder || null,
+            ariaLabel: el.getAttribute('aria-label') || null,
+            innerText: el.innerText?.substring(0, 50) || null
+        };
+    })
+    """
+    
+    # JavaScript to click an element by marker ID
+    CLICK_ELEMENT_SCRIPT = """
+    (id) => {
+        const el = window.__visionAgentRegistry?.get(Number(id));
+        if (!el || !el.isConnected) return false;
+        el.scrollIntoView({ block: 'center' });
+        el.click();
+        return true;
+    }
+    """
+    
+    # JavaScript to focus and fill an element by marker ID
+    FILL_ELEMENT_SCRIPT = """
+    ({ id, value }) => {
+        const el = window.__visionAgentRegistry?.get(Number(id));
+        if (!el || !el.isConnected) return false;
+        el.scrollIntoView({ block: 'center' });
+        el.focus();
+        if (el.isContentEditable) {
+            el.textContent = value;
+        } else {
+            // Use the native setter so framework-controlled inputs see the change
+            const proto = Object.getPrototypeOf(el);
+            const setter = Object.getOwnPropertyDescriptor(proto, 'value')?.set;
+            if (setter) setter.call(el, value); else el.value = value;
+        }
+        el.dispatchEvent(new Event('input', { bubbles: true }));
+        el.dispatchEvent(new Event('change', { bubbles: true }));
+        return true;
+    }
+    """
+    
     def __init__(self, page: Page):
         """
         Initialize ElementMarker with a Playwright page.
         
+        Registers the marker scripts as page helpers so V8 compiles them once
+        per document instead of once per step.
+        
         Args:
             page: Playwright Page object
         """
         self.page = page
         self.markers = []
+        self._helpers_script = (
+            f"{self.CANDIDATES_SCRIPT}\n"
+            f"window.__visionAgentMark = {self.MARKER_INJECTION_SCRIPT};\n"
+            f"window.__visionAgentUnmark = {self.MARKER_REMOVAL_SCRIPT};\n"
+            f"window.__visionAgentGet = {self.GET_ELEMENT_SCRIPT};\n"
+            f"window.__visionAgentDescribe = {self.DESCRIBE_ELEMENTS_SCRIPT};\n"
+            f"window.__visionAgentClick = {self.CLICK_ELEMENT_SCRIPT};\n"
+            f"window.__visionAgentFill = {self.FILL_ELEMENT_SCRIPT};"
+        )
+        try:
+            # Runs on every new document, including SPA full navigations
+            self.page.add_init_script(script=self._helpers_script)
+        except Exception as e:
+            console.print(f"[yellow]Warning: Failed to register marker scripts: {e}[/yellow]")
+    
+    def _call_helper(self, name: str, arg=None):
+        """
+        Call a registered marker helper, installing it first if the current
+        document predates the init script.
+        
+        Args:
+            name: Window property name of the helper
+            arg: Optional argument passed to the helper
+            
+        Returns:
+            The helper's return value
+        """
+        dispatcher = f"(arg) => window.{name} ? {{ value: window.{name}(arg) }} : null"
+        result = self.page.evaluate(dispatcher, arg)
+        if result is None:
+            self.page.evaluate(f"() => {{ {self._helpers_script} }}")
+            result = self.page.evaluate(dispatcher, arg)
+        return result['value'] if result else None
     
     def inject_markers(self) -> list:
         """
         Inject numbered markers onto all interactive elements.
         
         Returns:
-            List of marker metadata with element information
+            List of compact marker summaries (id, tag, center coordinates)
         """
         try:
             console.print("[dim]Injecting element markers...[/dim]")
-            self.markers = self.page.evaluate(self.MARKER_INJECTION_SCRIPT)
+            self.markers = self._call_helper("__visionAgentMark") or []
             console.print(f"[green]✓ Marked {len(self.markers)} interactive elements[/green]")
             return self.markers
         except Exception as e:
@@ -191,7 +339,7 @@ class ElementMarker:
     def remove_markers(self):
         """Remove all injected markers from the page."""
         try:
-            self.page.evaluate(self.MARKER_REMOVAL_SCRIPT)
+            self._call_helper("__visionAgentUnmark")
             self.markers = []
             console.print("[dim]Removed element markers[/dim]")
         except Exception as e:
@@ -208,7 +356,7 @@ class ElementMarker:
             Dictionary with element information or None if not found
         """
         try:
-            return self.page.evaluate(self.GET_ELEMENT_SCRIPT, element_id)
+            return self._call_helper("__visionAgentGet", element_id)
         except Exception as e:
             console.print(f"[red]✗ Failed to get element info: {e}[/red]")
             return None
@@ -223,17 +371,11 @@ class ElementMarker:
         Returns:
             True if click succeeded, False otherwise
         """
-        info = self.get_element_info(element_id)
-        if not info or not info.get('found'):
-            console.print(f"[red]✗ Element #{element_id} not found[/red]")
-            return False
-        
         try:
-            # Click at the center of the element
-            center_x = info['rect']['centerX']
-            center_y = info['rect']['centerY']
-            self.page.mouse.click(center_x, center_y)
-            console.print(f"[green]✓ Clicked element #{element_id} at ({center_x:.0f}, {center_y:.0f})[/green]")
+            if not self._call_helper("__visionAgentClick", element_id):
+                console.print(f"[red]✗ Element #{element_id} not found[/red]")
+                return False
+            console.print(f"[green]✓ Clicked element #{element_id}[/green]")
             return True
         except Exception as e:
             console.print(f"[red]✗ Failed to click element #{element_id}: {e}[/red]")
@@ -250,16 +392,11 @@ class ElementMarker:
         Returns:
             True if fill succeeded, False otherwise
         """
-        info = self.get_element_info(element_id)
-        if not info or not info.get('found'):
-            console.print(f"[red]✗ Element #{element_id} not found[/red]")
-            return False
-        
         try:
-            # Click to focus, then fill
-            selector = f'[data-vision-agent-id="{element_id}"]'
-            self.page.click(selector)
-            self.page.fill(selector, value)
+            # Focus, set value and dispatch input/change in a single round trip
+            if not self._call_helper("__visionAgentFill", {"id": element_id, "value": value}):
+                console.print(f"[red]✗ Element #{element_id} not found[/red]")
+                return False
             console.print(f"[green]✓ Filled element #{element_id} with '{value[:30]}...'[/green]" if len(value) > 30 else f"[green]✓ Filled element #{element_id} with '{value}'[/green]")
             return True
         except Exception as e:
@@ -277,8 +414,13 @@ class ElementMarker:
         if not self.markers:
             return "No markers present"
         
+        try:
+            described = self._call_helper("__visionAgentDescribe", [m['id'] for m in self.markers]) or []
+        except Exception as e:
+            return f"Failed to describe markers: {e}"
+        
         lines = ["Marked Elements:"]
-        for m in self.markers:
+        for m in filter(None, described):
             desc = f"  #{m['id']}: <{m['tagName']}"
             if m.get('type'):
                 desc += f" type='{m['type']}'"
@@ -12,13 +12,13 @@ All handlers are designed to work across multiple ATS platforms:
 Greenhouse, Lever, Ashby, Workday, Keka, Weekday, etc.
 """
 
-from .base import BaseHandler, scroll_element_into_view, wait_for_element
+from .base import BaseHandler, first_visible, scroll_element_into_view, wait_for_element
 from .input_handler import InputHandler
 from .checkbox_handler import CheckboxHandler
 from .radio_handler import RadioHandler
 from .dropdown_handler import DropdownHandler
 from .file_handler import FileHandler
-from .form_controller import FormController
+from .form_controller import FormController, is_page_changing
 
 __all__ = [
     "BaseHandler",
@@ -28,6 +28,8 @@ __all__ = [
     "DropdownHandler",
     "FileHandler",
     "FormController",
+    "first_visible",
+    "is_page_changing",
     "scroll_element_into_view",
     "wait_for_element",
 ]
@@ -2,12 +2,55 @@
 Base Handler - Common utilities and base class for all form handlers.
 """
 
-import time
-from typing import Optional, List, Callable
+import functools
+import inspect
+import os
+from typing import Optional, List, Callable, Dict, Iterable, Union
 from playwright.sync_api import Page, Locator
-from rich.console import Console
 
-console = Console()
+from .._console import console
+from .resolver import RESOLVER_JS
+
+
+class _NoStackInspect:
+    """Stand-in for the inspect module whose stack() skips frame capture."""
+    
+    def __getattr__(self, name):
+        return getattr(inspect, name)
+    
+    @staticmethod
+    def stack(*args, **kwargs) -> list:
+        return []
+
+
+def _disable_playwright_stack_capture():
+    """
+    Stop Playwright from calling inspect.stack() on every API call.
+    
+    The captured frames only feed trace/debug metadata, but building them
+    dominates short calls like count() and is_visible(). Only Playwright's own
+    reference to inspect is replaced; the global module is untouched.
+    """
+    try:
+        from playwright._impl import _connection
+    except ImportError:
+        return
+    if getattr(_connection, "inspect", None) is inspect:
+        _connection.inspect = _NoStackInspect()
+
+
+# Opt-in: PW_INSPECT_STACK=0 trades Playwright call-site traces for speed
+if os.environ.get("PW_INSPECT_STACK") == "0":
+    _disable_playwright_stack_capture()
+
+
+# Timeouts (ms) passed explicitly so a missed field never inherits Playwright's
+# 30 s default: probes fail fast, actions commit, uploads stream file bytes
+PROBE_TIMEOUT_MS = 500
+ACTION_TIMEOUT_MS = 2000
+UPLOAD_TIMEOUT_MS = 5000
+# Page-wide ceiling for any call without an explicit timeout
+DEFAULT_TIMEOUT_MS = 5000
 
 
 def scroll_element_into_view(page: Page, locator: Locator) -> bool:
@@ -23,8 +66,12 @@ def scroll_element_into_view(page: Page, locator: Locator) -> bool:
     """
     try:
         if locator.count() > 0:
-            locator.first.scroll_into_view_if_needed()
-            time.sleep(0.3)
+            locator.first.scroll_into_view_if_needed(timeout=ACTION_TIMEOUT_MS)
+            try:
+                # Returns as soon as the element is visible instead of a fixed delay
+                locator.first.wait_for(state="visible", timeout=1000)
+            except Exception:
+                pass
             return True
     except Exception:
         pass
@@ -49,6 +96,160 @@ def wait_for_element(locator: Locator, timeout: float = 5.0) -> bool:
         return False
 
 
+def first_visible(locator: Locator, timeout_ms: int = 0) -> Optional[Locator]:
+    """
+    Return the locator's first match if it is visible.
+    
+    Replaces the count() + is_visible() pair with one round trip. With no
+    timeout this is a single is_visible() check, which answers False for a
+    missing element immediately; a timeout polls with wait_for instead, for
+    elements expected to appear shortly.
+    
+    Args:
+        locator: Playwright locator
+        timeout_ms: How long to wait for visibility (0 = check once)
+        
+    Returns:
+        locator.first, or None if nothing visible matched
+    """
+    first = locator.first
+    try:
+        if timeout_ms > 0:
+            first.wait_for(state="visible", timeout=timeout_ms)
+            return first
+        return first if first.is_visible() else None
+    except Exception:
+        return None
+
+
+# Returns the index of the first selector matching a rendered element, or -1.
+# Invalid selectors (e.g. Playwright-only pseudos) are skipped, not fatal.
+_PROBE_VISIBLE_JS = """
+(selectors) => selectors.findIndex(s => {
+    let el;
+    try { el = document.querySelector(s); } catch (e) { return false; }
+    if (!el) return false;
+    const r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0;
+})
+"""
+
+
+# Returns the index of the first selector matching any element, rendered or
+# not (file inputs are usually visually hidden), or -1.
+_PROBE_EXISTS_JS = """
+(selectors) => selectors.findIndex(s => {
+    try { return document.querySelector(s) !== null; } catch (e) { return false; }
+})
+"""
+
+
+# Selector shapes shared by the handlers. {lbl} is the label/value text and
+# {tag} the element (or compound selector) being located.
+SELECTOR_TEMPLATES = {
+    "name_contains": '{tag}[name*="{lbl}"]',
+    "id_contains": '{tag}[id*="{lbl}"]',
+    "aria_contains": '{tag}[aria-label*="{lbl}" i]',
+    "aria_exact": '{tag}[aria-label="{lbl}" i]',
+    "aria_inner": '[aria-label*="{lbl}" i] {tag}',
+    "has_text": '{tag}:has-text("{lbl}")',
+    "text_container": 'div:has-text("{lbl}") >> {tag}',
+    "label_inner": 'label:has-text("{lbl}") {tag}',
+    "label_plus": 'label:has-text("{lbl}") + {tag}',
+    "label_sibling": 'label:has-text("{lbl}") ~ {tag}',
+}
+
+
+# Escapes for text placed inside a double-quoted CSS string. Without them a
+# label like Resume ("PDF") breaks the selector and drops to slower fallbacks.
+_CSS_STRING_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\a ', '\r': ''})
+
+
+def _css_quote(text: str) -> str:
+    """Escape text for use inside a double-quoted CSS/Playwright selector string."""
+    return text.translate(_CSS_STRING_ESCAPES)
+
+
+@functools.lru_cache(maxsize=2048)
+def build_selector(template: str, lbl: str, tag: str = "") -> str:
+    """
+    Format a SELECTOR_TEMPLATES entry.
+    
+    Cached at module level so every handler shares hits for recurring labels.
+    
+    Args:
+        template: Key into SELECTOR_TEMPLATES
+        lbl: Label or value text to match (escaped here)
+        tag: Element or compound selector the template applies to
+        
+    Returns:
+        CSS/Playwright selector string
+    """
+    return SELECTOR_TEMPLATES[template].format(lbl=_css_quote(lbl), tag=tag)
+
+
+# True if any part of the element's box intersects the viewport
+_IN_VIEWPORT_JS = """
+(el) => {
+    const r = el.getBoundingClientRect();
+    return r.bottom > 0 && r.right > 0 && r.top < window.innerHeight && r.left < window.innerWidth;
+}
+"""
+
+
+# Maps normalized label text to the id its label[for] points at (first wins)
+_LABEL_INDEX_JS = """
+() => {
+    const index = {};
+    for (const label of document.querySelectorAll('label[for]')) {
+        const key = (label.textContent || '').replace(/\\s+/g, ' ').trim()
+            .toLowerCase().replace(/[\\s*:]+$/, '');
+        if (key && label.htmlFor && !(key in index)) index[key] = label.htmlFor;
+    }
+    return index;
+}
+"""
+
+
+# Last-resort click (window.__formBot.clickByText): DOM click on the first
+# button/link whose text or aria-label contains the (already lowercased) label.
+# Lowercased text is kept per element in a WeakMap across calls and recomputed
+# only when the element's text changes.
+_CLICK_BY_TEXT_JS = """
+(needle) => {
+    const cache = window.__pwLowerCache ||= new WeakMap();
+    const lower = el => {
+        const source = el.textContent + '|' + (el.getAttribute('aria-label') || '');
+        let entry = cache.get(el);
+        if (!entry || entry.source !== source) {
+            entry = { source, lower: source.toLowerCase() };
+            cache.set(el, entry);
+        }
+        return entry.lower;
+    };
+    const elements = document.querySelectorAll('button, a, [role="button"], input[type="submit"]');
+    for (const el of elements) {
+        if (lower(el).includes(needle)) {
+            el.scrollIntoView({ behavior: 'smooth', block: 'center' });
+            el.click();
+            return true;
+        }
+    }
+    return false;
+}
+"""
+
+
+@functools.lru_cache(maxsize=1024)
+def _label_index_key(label: str) -> str:
+    """Normalize label text the same way _LABEL_INDEX_JS does."""
+    return " ".join(label.split()).lower().rstrip(" *:")
+
+
+# Characters dropped when normalizing labels for attribute matching
+_LABEL_STRIP_TABLE = str.maketrans('', '', ' -_')
+
+
 class BaseHandler:
     """
     Base class for all form element handlers.
@@ -57,6 +258,16 @@ class BaseHandler:
     scrolling, and fallback strategies.
     """
     
+    # JS helpers exposed on the page as window.__formBot.<name>, as
+    # {name: function source}; merged across all handlers (see _formbot_script)
+    PAGE_HELPERS: dict = {}
+    
+    # Per-action success/debug lines; FormController sets this on its handlers
+    verbose: bool = True
+    
+    # Strategy that most recently reached its action (see _remember_strategy)
+    _last_strategy: Union[Locator, str, None] = None
+    
     def __init__(self, page: Page):
         """
         Initialize handler with Playwright page.
@@ -65,66 +276,325 @@ class BaseHandler:
             page: Playwright Page object
         """
         self.page = page
+        try:
+            # Page-wide: calls that need longer (goto, the agent's screenshots)
+            # pass an explicit timeout; this bounds everything else
+            page.set_default_timeout(DEFAULT_TIMEOUT_MS)
+        except Exception:
+            pass
+        self._install_page_helpers()
+        
+        # label text -> input id, built lazily and dropped on navigation
+        self._label_index: Optional[dict] = None
+        # "Handler:label" -> winning strategy (CSS selector, or the description
+        # of a Playwright locator), tried first on the next call for that label
+        self._locator_cache: Dict[str, Union[str, tuple]] = {}
+        try:
+            page.on("framenavigated", self._on_frame_navigated)
+        except Exception:
+            pass
+    
+    def _on_frame_navigated(self, frame):
+        """Invalidate per-document caches when the main frame navigates."""
+        if frame == self.page.main_frame:
+            self._label_index = None
+            self._locator_cache.clear()
+    
+    def _build_label_index(self) -> dict:
+        try:
+            return self.page.evaluate("() => window.__formBot.labelIndex()") or {}
+        except Exception:
+            return {}
+    
+    def _locate_by_label_for(self, target_label: str) -> Optional[Locator]:
+        """
+        Resolve a field through its <label for=...> in O(1).
+        
+        The label index is built once per document. A miss on an older index
+        rebuilds it once, since single-page forms render new steps without
+        navigating.
+        
+        Args:
+            target_label: Visible label text
+            
+        Returns:
+            Locator for the linked element, or None if no label links to it
+        """
+        key = _label_index_key(target_label)
+        if not key:
+            return None
+        fresh = self._label_index is None
+        if fresh:
+            self._label_index = self._build_label_index()
+        input_id = self._label_index.get(key)
+        if input_id is None and not fresh:
+            self._label_index = self._build_label_index()
+            input_id = self._label_index.get(key)
+        # Playwright's id= engine needs no CSS escaping
+        return self.page.locator(f"id={input_id}") if input_id else None
+    
+    def _resolve(self, action_type: str, label: str, value: str = "") -> dict:
+        """
+        Run the in-browser resolver for an action.
+        
+        Args:
+            action_type: 'select' or 'upload'
+            label: Field label text
+            value: Option to select, if any
+            
+        Returns:
+            Resolver result; status is 'done', 'found' or 'none'
+        """
+        try:
+            result = self.page.evaluate(
+                "(action) => window.__formBot.resolve(action)",
+                {"type": action_type, "label": label, "value": value}
+            )
+        except Exception:
+            result = None
+        return result or {"status": "none"}
+    
+    def _install_page_helpers(self):
+        """
+        Install the shared window.__formBot API once per page, so handler
+        calls only marshal their arguments instead of re-sending (and
+        re-parsing) function source.
+        """
+        if getattr(self.page, "_formbot_installed", False):
+            return
+        script = _formbot_script()
+        try:
+            # Future documents get the helpers before any page script runs
+            self.page.add_init_script(script=script)
+            # The current document predates the init script
+            self.page.evaluate(f"() => {{ {script} }}")
+        except Exception as e:
+            self._log_debug(f"Could not install page helpers: {e}")
+            return
+        try:
+            # Later handlers on the same page skip the install
+            self.page._formbot_installed = True
+        except AttributeError:
+            pass
     
     def _try_locators(
         self, 
-        locators: List[Locator], 
+        locators: Iterable[Union[Locator, str]], 
         action: Callable[[Locator], bool],
-        scroll_retry: bool = True
+        scroll_retry: bool = True,
+        cache_key: Optional[str] = None
     ) -> bool:
         """
         Try multiple locator strategies until one succeeds.
         
+        Strategies may be Playwright locators or plain CSS selector strings.
+        Consecutive CSS strings are probed together in one page.evaluate, and
+        only the winning one is turned into a locator. Strategies may be
+        supplied lazily (e.g. from a generator).
+        
         Args:
-            locators: List of Playwright locators to try
+            locators: Locators or CSS selectors to try, in priority order
             action: Function to call on successful locator
             scroll_retry: If True, scroll and retry on first failure
+            cache_key: If given, try the strategy that won last time for this
+                key first, and remember the winner of this call
             
         Returns:
             True if any locator succeeded
         """
-        # First pass - try all locators
-        for locator in locators:
-            try:
-                if locator.count() > 0:
-                    scroll_element_into_view(self.page, locator)
-                    if locator.first.is_visible():
-                        if action(locator.first):
-                            return True
-            except Exception:
-                continue
+        if cache_key is not None:
+            locators = list(locators)
+            if self._try_cached(cache_key, locators, action):
+                return True
+        
+        # First pass - try all strategies, remembering them for the retry
+        tried = []
+        found = self._try_strategies(locators, action, tried)
         
         # Second pass - scroll down and retry
-        if scroll_retry:
+        if not found and scroll_retry:
             self.page.mouse.wheel(0, 400)
-            time.sleep(0.5)
+            try:
+                # Lazy-loaded sections may fetch content as they scroll in
+                self.page.wait_for_load_state("networkidle", timeout=500)
+            except Exception:
+                pass
+            found = self._try_strategies(tried, action)
+        
+        if found and cache_key is not None:
+            self._remember_strategy(cache_key, tried, self._last_strategy)
+        return found
+    
+    def _try_cached(
+        self,
+        cache_key: str,
+        strategies: List[Union[Locator, str]],
+        action: Callable[[Locator], bool]
+    ) -> bool:
+        """
+        Try the strategy remembered for a key before the full ladder.
+        
+        Args:
+            cache_key: "Handler:label" key
+            strategies: This call's strategy list (cached locators are looked up in it)
+            action: Function to call on the resolved locator
             
-            for locator in locators:
-                try:
-                    if locator.count() > 0:
-                        scroll_element_into_view(self.page, locator)
-                        if locator.first.is_visible():
-                            if action(locator.first):
-                                return True
-                except Exception:
-                    continue
+        Returns:
+            True if the cached strategy still works; a stale entry is dropped
+        """
+        cached = self._locator_cache.get(cache_key)
+        if cached is None:
+            return False
+        if isinstance(cached, str):
+            strategy = cached
+        else:
+            _, description = cached
+            strategy = next(
+                (s for s in strategies if not isinstance(s, str) and str(s) == description),
+                None
+            )
+        if strategy is not None and self._try_strategies([strategy], action):
+            return True
+        del self._locator_cache[cache_key]
+        return False
+    
+    def _remember_strategy(
+        self,
+        cache_key: str,
+        strategies: List[Union[Locator, str]],
+        winner: Union[Locator, str, None]
+    ):
+        """
+        Cache the recipe of a winning strategy, not the Locator itself.
         
+        CSS selectors are stored as-is; Playwright locators (role, label,
+        placeholder queries) by their description, which includes the selector
+        and so stays valid when a later call adds or drops strategies (e.g. the
+        <label for> hit that fill() puts first only when it resolves).
+        """
+        if isinstance(winner, str):
+            self._locator_cache[cache_key] = winner
+        elif any(strategy is winner for strategy in strategies):
+            self._locator_cache[cache_key] = ("locator", str(winner))
+    
+    def _try_strategies(
+        self,
+        strategies: Iterable[Union[Locator, str]],
+        action: Callable[[Locator], bool],
+        tried: Optional[list] = None
+    ) -> bool:
+        """Run one pass over the strategies, batching runs of CSS selectors."""
+        pending = []
+        for strategy in strategies:
+            if tried is not None:
+                tried.append(strategy)
+            if isinstance(strategy, str):
+                pending.append(strategy)
+                continue
+            if pending and self._try_css_selectors(pending, action):
+                return True
+            pending = []
+            if self._try_locator(strategy, action):
+                return True
+        return bool(pending) and self._try_css_selectors(pending, action)
+    
+    def _try_css_selectors(
+        self,
+        selectors: List[str],
+        action: Callable[[Locator], bool],
+        require_visible: bool = True
+    ) -> bool:
+        """
+        Probe CSS selectors in one round trip and act on the first match.
+        
+        Args:
+            selectors: Plain CSS selectors, in priority order
+            action: Function to call on the matching locator
+            require_visible: If False, accept hidden elements and skip scrolling
+                (e.g. file inputs, which are set directly)
+            
+        Returns:
+            True if the action succeeded on any match
+        """
+        probe = _PROBE_VISIBLE_JS if require_visible else _PROBE_EXISTS_JS
+        start = 0
+        while start < len(selectors):
+            try:
+                index = self.page.evaluate(probe, selectors[start:])
+            except Exception:
+                return False
+            if index < 0:
+                return False
+            self._last_strategy = selectors[start + index]
+            locator = self.page.locator(self._last_strategy)
+            try:
+                if require_visible:
+                    self._ensure_in_view(locator)
+                if action(locator.first):
+                    return True
+            except Exception:
+                pass
+            start += index + 1
+        return False
+    
+    def _try_locator(self, locator: Locator, action: Callable[[Locator], bool]) -> bool:
+        """Act on a single Playwright locator if it resolves to a visible element."""
+        self._last_strategy = locator
+        # A miss costs one round trip instead of count() + scroll + is_visible()
+        first = self._first_visible(locator)
+        if first is None:
+            return False
+        try:
+            first.scroll_into_view_if_needed(timeout=ACTION_TIMEOUT_MS)
+            return bool(action(first))
+        except Exception:
+            pass
         return False
     
-    def _normalize_label(self, label: str) -> str:
+    def _first_visible(self, locator: Locator, timeout_ms: int = 0) -> Optional[Locator]:
+        """First visible match of a locator, or None (see first_visible)."""
+        return first_visible(locator, timeout_ms)
+    
+    def _ensure_in_view(self, locator: Locator) -> bool:
+        """
+        Scroll an element into view only if it is not already on screen.
+        
+        An on-screen element costs one geometry check instead of the
+        count/scroll/wait sequence (and the layout it forces).
+        
+        Args:
+            locator: Playwright locator for the element
+            
+        Returns:
+            True if the element is in (or was scrolled into) view
+        """
+        try:
+            if locator.first.evaluate(_IN_VIEWPORT_JS, timeout=PROBE_TIMEOUT_MS):
+                return True
+        except Exception:
+            pass
+        return scroll_element_into_view(self.page, locator)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _normalize_label(label: str) -> str:
         """
         Normalize a label for matching.
         
+        Cached across handlers: the same labels recur on every step and page.
+        
         Args:
             label: Original label text
             
         Returns:
-            Normalized version (lowercase, no spaces)
+            Normalized version (lowercase, no spaces, hyphens or underscores)
         """
-        return label.lower().replace(" ", "").replace("-", "").replace("_", "")
+        return label.lower().translate(_LABEL_STRIP_TABLE)
     
     def _log_success(self, action: str, target: str, method: str = ""):
-        """Log successful action."""
+        """Log successful action (skipped when not verbose)."""
+        if not self.verbose:
+            return
         method_str = f" ({method})" if method else ""
         console.print(f"[green]✓ {action} '{target}'{method_str}[/green]")
     
@@ -133,5 +603,23 @@ class BaseHandler:
         console.print(f"[yellow]⚠ {message}[/yellow]")
     
     def _log_debug(self, message: str):
-        """Log debug message."""
+        """Log debug message (skipped when not verbose)."""
+        if not self.verbose:
+            return
         console.print(f"[dim]{message}[/dim]")
+
+
+@functools.lru_cache(maxsize=1)
+def _formbot_script() -> str:
+    """
+    Build the window.__formBot script from the shared helpers and every
+    handler's PAGE_HELPERS (all handler modules are imported by the package).
+    """
+    helpers = {"resolve": RESOLVER_JS, "labelIndex": _LABEL_INDEX_JS, "clickByText": _CLICK_BY_TEXT_JS}
+    pending = [BaseHandler]
+    while pending:
+        cls = pending.pop()
+        helpers.update(cls.PAGE_HELPERS)
+        pending.extend(cls.__subclasses__())
+    body = ",\n".join(f"{name}: {source.strip()}" for name, source in helpers.items())
+    return f"window.__formBot = {{\n{body}\n}};"
@@ -2,9 +2,115 @@
 Checkbox Handler - Handles checkbox interactions.
 """
 
+import functools
 import time
 from playwright.sync_api import Page
-from .base import BaseHandler, scroll_element_into_view
+from .base import ACTION_TIMEOUT_MS, BaseHandler, build_selector
+
+
+# Finds a checkbox by its label text and checks it (label click as fallback)
+_CHECK_BY_LABEL_JS = """
+(label) => {
+    const needle = label.trim().toLowerCase();
+    // An empty needle would match (and click) the first label on the page
+    if (!needle) return false;
+    for (const lab of document.querySelectorAll('label')) {
+        if (lab.textContent.toLowerCase().includes(needle)) {
+            const forId = lab.getAttribute('for');
+            const cb = lab.querySelector('input[type="checkbox"]') ||
+                       (forId ? document.getElementById(forId) : null);
+            if (cb) {
+                cb.scrollIntoView({ block: 'center' });
+                if (!cb.checked) cb.click();
+                return true;
+            }
+            lab.click();
+            return true;
+        }
+    }
+    return false;
+}
+"""
+
+
+# Resolves the checkbox for a label in one DOM walk using exact matches only:
+# aria-label or role text equal to the label, then a <label> with that text
+# via its for= target or a nested checkbox. Returns the element or null; the
+# looser name/id and container heuristics stay in the handler's locator ladder.
+_FIND_CHECKBOX_JS = """
+(label) => {
+    const BOX = 'input[type="checkbox"], [role="checkbox"], [role="switch"]';
+    const norm = s => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase().replace(/[\\s*:]+$/, '');
+    const needle = norm(label);
+    if (!needle) return null;
+    
+    for (const el of document.querySelectorAll(BOX)) {
+        if (norm(el.getAttribute('aria-label')) === needle) return el;
+        if (el.hasAttribute('role') && norm(el.textContent) === needle) return el;
+    }
+    
+    for (const lab of document.querySelectorAll('label')) {
+        if (norm(lab.textContent) !== needle) continue;
+        const forId = lab.getAttribute('for');
+        const linked = forId ? document.getElementById(forId) : null;
+        if (linked && linked.matches(BOX)) return linked;
+        const inner = lab.querySelector(BOX);
+        if (inner) return inner;
+    }
+    return null;
+}
+"""
+
+
+@functools.lru_cache(maxsize=256)
+def _checkbox_selectors(target_label: str, target_lower: str) -> tuple:
+    """
+    Build the CSS fallback selectors for a checkbox label once per label.
+    
+    Args:
+        target_label: Label text as given by the model
+        target_lower: Normalized label used for name/id matching
+        
+    Returns:
+        Tuple of (name/id attribute selectors, text-based container selectors)
+    """
+    attribute_selectors = (
+        build_selector("name_contains", target_lower, 'input[type="checkbox"]'),
+        build_selector("id_contains", target_lower, 'input[type="checkbox"]'),
+    )
+    text_selectors = (
+        build_selector("has_text", target_label, 'label'),
+        build_selector("has_text", target_label, '[role="checkbox"]'),
+        build_selector("has_text", target_label, '[role="switch"]'),
+    )
+    return attribute_selectors, text_selectors
+
+
+# Finds the checkbox with findCheckbox and checks it in the same round trip.
+# A click is tried first so framework handlers run; if the click is swallowed,
+# the native setter is used and input/change are dispatched so controlled
+# components (React etc.) still see the new state. Returns the final state,
+# or null when no checkbox matched.
+_CHECK_FOUND_JS = """
+(label) => {
+    const el = window.__formBot.findCheckbox(label);
+    if (!el) return null;
+    const isInput = el instanceof HTMLInputElement;
+    const isChecked = () => isInput ? el.checked : el.getAttribute('aria-checked') === 'true';
+    
+    el.scrollIntoView({ block: 'center' });
+    if (isChecked()) return { checked: true, already: true };
+    
+    el.click();
+    if (!isChecked() && isInput) {
+        const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'checked').set;
+        setter.call(el, true);
+        el.dispatchEvent(new Event('input', { bubbles: true }));
+        el.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+    return { checked: isChecked(), already: false };
+}
+"""
 
 
 class CheckboxHandler(BaseHandler):
@@ -13,28 +119,38 @@ class CheckboxHandler(BaseHandler):
     Enhanced to handle hidden inputs and custom switches.
     """
     
+    PAGE_HELPERS = {
+        "checkByLabel": _CHECK_BY_LABEL_JS,
+        "findCheckbox": _FIND_CHECKBOX_JS,
+        "checkFound": _CHECK_FOUND_JS,
+    }
+    
     def check(self, action: dict) -> bool:
         target_label = action.get('target_label', '')
         target_lower = self._normalize_label(target_label)
         
-        locators = [
+        # Fast path: exact label matches are found, checked and verified
+        # in-browser with one round trip; anything looser goes to the ladder
+        if self._check_with_js(target_label):
+            return True
+        
+        attribute_selectors, text_selectors = _checkbox_selectors(target_label, target_lower)
+        
+        def locator_strategies():
             # 1. Standard Role
-            self.page.get_by_role("checkbox", name=target_label),
+            yield self.page.get_by_role("checkbox", name=target_label)
             # 2. Label match
-            self.page.get_by_label(target_label, exact=False),
+            yield self.page.get_by_label(target_label, exact=False)
             # 3. Input by Name/ID
-            self.page.locator(f'input[type="checkbox"][name*="{target_lower}"]'),
-            self.page.locator(f'input[type="checkbox"][id*="{target_lower}"]'),
+            yield from attribute_selectors
             # 4. ROBUST: Label containing checkbox
-            self.page.locator(f'label:has-text("{target_label}")'),
             # 5. Custom UI (Switch/Div)
-            self.page.locator(f'[role="checkbox"]:has-text("{target_label}")'),
-            self.page.locator(f'[role="switch"]:has-text("{target_label}")'),
-        ]
+            for selector in text_selectors:
+                yield self.page.locator(selector)
         
         def check_action(element):
             try:
-                scroll_element_into_view(self.page, element)
+                self._ensure_in_view(element)
                 
                 # Check current state if possible
                 try:
@@ -44,7 +160,7 @@ class CheckboxHandler(BaseHandler):
                     pass
 
                 # Force click
-                element.click(force=True, timeout=1000)
+                element.click(force=True, timeout=ACTION_TIMEOUT_MS)
                 return True
             except Exception:
                 # JS Click fallback
@@ -54,43 +170,40 @@ class CheckboxHandler(BaseHandler):
                 except:
                     return False
         
-        if self._try_locators(locators, check_action):
+        if self._try_locators(locator_strategies(), check_action):
             self._log_success("Checked", target_label)
             return True
         
-        # JS Fallback
-        if self._check_with_js(target_label):
+        # Last resort: click the matching label itself
+        if self._click_label_with_js(target_label):
             return True
         
         self._log_warning(f"Could not check: {target_label}")
         return False
     
     def _check_with_js(self, target_label: str) -> bool:
+        """
+        Check the checkbox resolved by the in-browser finder, if any.
+        
+        Args:
+            target_label: Label, aria-label, name or id text of the checkbox
+            
+        Returns:
+            True if a matching checkbox ends up checked
+        """
+        try:
+            result = self.page.evaluate("(label) => window.__formBot.checkFound(label)", target_label)
+        except Exception:
+            return False
+        if not result or not result.get('checked'):
+            return False
+        self._log_success("Checked", target_label, "already checked" if result.get('already') else "fast path")
+        return True
+    
+    def _click_label_with_js(self, target_label: str) -> bool:
         try:
-            js_result = self.page.evaluate(f'''
-                () => {{
-                    // Search all labels
-                    const labels = document.querySelectorAll('label');
-                    for (const label of labels) {{
-                        if (label.textContent.toLowerCase().includes("{target_label.lower()}")) {{
-                            // Find associated input
-                            const checkbox = label.querySelector('input[type="checkbox"]') || 
-                                            document.getElementById(label.getAttribute('for'));
-                            
-                            if (checkbox) {{
-                                if (!checkbox.checked) {{
-                                    checkbox.click();
-                                }}
-                                return true;
-                            }}
-                            // Click label as fallback
-                            label.click();
-                            return true;
-                        }}
-                    }}
-                    return false;
-                }}
-            ''')
+            # Label is passed as an argument: no per-call parse, no quote escaping
+            js_result = self.page.evaluate("(label) => window.__formBot.checkByLabel(label)", target_label)
             if js_result:
                 self._log_success("Checked", target_label, "JS fallback")
                 return True
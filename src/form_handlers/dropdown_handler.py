@@ -3,9 +3,100 @@ Dropdown Handler - Handles native and custom dropdowns.
 Enhanced with global option search for React Portals.
 """
 
-import time
-from playwright.sync_api import Page
-from .base import BaseHandler, scroll_element_into_view
+import functools
+from typing import Optional
+from playwright.sync_api import Page, Locator
+from .base import ACTION_TIMEOUT_MS, PROBE_TIMEOUT_MS, BaseHandler, build_selector
+
+
+# Open menu containers across common UI libraries (ARIA, React-Select, MUI, AntD)
+_MENU_SELECTOR = (
+    '[role="listbox"], [role="menu"], .select__menu, .MuiPaper-root, .ant-select-dropdown'
+)
+
+
+# Index of the first rendered element among the first `limit` matches, or -1
+# (same test as Playwright's is_visible: non-empty box, not visibility:hidden)
+_FIRST_VISIBLE_JS = """
+(elements, limit) => elements.slice(0, limit).findIndex(el => {
+    const r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+})
+"""
+
+
+# Generic trigger lookup scoped to the label: find the element whose own text is
+# the label, then the nearest dropdown control in its surrounding containers.
+# Visits label-ish elements once instead of every div:has-text(...) on the page.
+_LABEL_TRIGGER_JS = """
+(label) => {
+    const needle = label.trim().toLowerCase();
+    if (!needle) return null;
+    const TRIGGER = '[role="combobox"], .select__control, .MuiSelect-root, .ant-select, select';
+    const owner = Array.from(document.querySelectorAll('label, legend, span, div'))
+        .find(el => (el.textContent || '').trim().toLowerCase() === needle);
+    if (!owner) return null;
+    const own = owner.closest(TRIGGER);
+    if (own) return own;
+    let scope = owner.parentElement;
+    for (let depth = 0; scope && depth < 4; depth++, scope = scope.parentElement) {
+        const trigger = scope.querySelector(TRIGGER);
+        if (trigger) return trigger;
+    }
+    return owner.parentElement;
+}
+"""
+
+
+# Selector strings depend only on the label/value text, so they are built once
+# per distinct label and reused across rows, steps and pages.
+
+@functools.lru_cache(maxsize=256)
+def _native_select_selectors(target_label: str, target_lower: str) -> tuple:
+    """Selectors for a native <select>: (name, id, adjacent to label, sibling of label)."""
+    return (
+        build_selector("name_contains", target_lower, 'select'),
+        build_selector("id_contains", target_lower, 'select'),
+        build_selector("label_plus", target_label, 'select'),
+        build_selector("label_sibling", target_label, 'select'),
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _trigger_selectors(target_label: str) -> tuple:
+    """Selectors for a custom dropdown trigger, in priority order."""
+    return (
+        build_selector("aria_contains", target_label, '[role="combobox"]'),
+        build_selector("aria_contains", target_label),
+        build_selector("text_container", target_label, '[role="button"]'),
+        build_selector("label_sibling", target_label, 'div >> [role="combobox"]'),
+        build_selector("has_text", target_label, '.select__control'), # React-Select
+        build_selector("has_text", target_label, '.MuiSelect-root'), # MUI
+        build_selector("has_text", target_label, '.ant-select-selector'), # AntD
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _option_selectors(value: str) -> tuple:
+    """Selectors for a dropdown option, from specific to generic."""
+    return (
+        # High confidence: Role + exact accessible label (plain CSS)
+        build_selector("aria_exact", value, '[role="option"]'),
+        
+        # Medium confidence: Role + Contains Text
+        build_selector("has_text", value, '[role="option"]'),
+        build_selector("has_text", value, '[role="menuitem"]'),
+        build_selector("has_text", value, 'li'),
+        
+        # Framework specific
+        build_selector("has_text", value, '.select__option'), # React-Select
+        build_selector("has_text", value, '.MuiMenuItem-root'), # MUI
+        build_selector("has_text", value, '.ant-select-item-option-content'), # AntD
+        
+        # Generic
+        build_selector("has_text", value, 'div[id*="option"]'),
+        build_selector("has_text", value, 'div'),
+    )
 
 
 class DropdownHandler(BaseHandler):
@@ -20,12 +111,20 @@ class DropdownHandler(BaseHandler):
         target_lower = self._normalize_label(target_label)
         value_lower = value.lower().strip()
         
+        # 0. One-pass in-browser resolver (native <select> by label/aria/name/id)
+        if self._resolve("select", target_label, value)["status"] == "done":
+            self._log_success("Selected", value, f"native dropdown '{target_label}'")
+            return True
+        
+        # Element linked through <label for>, if any (tried first by both paths)
+        linked = self._locate_by_label_for(target_label)
+        
         # 1. Try native <select>
-        if self._handle_native_select(target_label, target_lower, value):
+        if self._handle_native_select(target_label, target_lower, value, linked):
             return True
         
         # 2. Handle custom dropdown
-        if self._handle_custom_dropdown(target_label, target_lower, value, value_lower):
+        if self._handle_custom_dropdown(target_label, target_lower, value, value_lower, linked):
             return True
         
         # 3. Keyboard fallback
@@ -35,80 +134,73 @@ class DropdownHandler(BaseHandler):
         self._log_warning(f"Could not select '{value}' in '{target_label}'")
         return False
     
-    def _handle_native_select(self, target_label: str, target_lower: str, value: str) -> bool:
+    def _handle_native_select(
+        self, target_label: str, target_lower: str, value: str, linked: Optional[Locator] = None
+    ) -> bool:
+        by_name, by_id, label_adjacent, label_sibling = _native_select_selectors(target_label, target_lower)
         native_locators = [
-            self.page.locator(f'select[name*="{target_lower}"]'),
-            self.page.locator(f'select[id*="{target_lower}"]'),
+            by_name,  # Plain CSS name/id selectors are probed in one round trip
+            by_id,
             self.page.get_by_label(target_label).locator('select'),
-            self.page.locator(f'label:has-text("{target_label}") + select'),
-            self.page.locator(f'label:has-text("{target_label}") ~ select'),
-            self.page.locator('select').filter(has=self.page.locator(f'option:has-text("{value}")')),
+            self.page.locator(label_adjacent),
+            self.page.locator(label_sibling),
+            self.page.locator('select').filter(has=self.page.locator(build_selector("has_text", value, 'option'))),
         ]
         
-        for locator in native_locators:
+        if linked is not None:
+            native_locators.insert(0, linked)
+        
+        def select_action(element) -> bool:
             try:
-                if locator.count() > 0:
-                    scroll_element_into_view(self.page, locator)
-                    if locator.first.is_visible():
-                        try:
-                            locator.first.select_option(label=value)
-                            self._log_success("Selected", value, f"native dropdown '{target_label}'")
-                            return True
-                        except:
-                            pass
-                        try:
-                            locator.first.select_option(value=value)
-                            self._log_success("Selected", value, f"native dropdown '{target_label}'")
-                            return True
-                        except:
-                            pass
-            except Exception:
-                continue
+                element.select_option(label=value, timeout=ACTION_TIMEOUT_MS)
+                return True
+            except:
+                pass
+            try:
+                element.select_option(value=value, timeout=ACTION_TIMEOUT_MS)
+                return True
+            except:
+                return False
+        
+        if self._try_locators(native_locators, select_action, scroll_retry=False):
+            self._log_success("Selected", value, f"native dropdown '{target_label}'")
+            return True
         return False
     
-    def _handle_custom_dropdown(self, target_label: str, target_lower: str, value: str, value_lower: str) -> bool:
+    def _handle_custom_dropdown(
+        self, target_label: str, target_lower: str, value: str, value_lower: str,
+        linked: Optional[Locator] = None
+    ) -> bool:
         self._log_debug(f"Trying custom dropdown for '{target_label}'...")
         
         # Find trigger
+        (combobox_aria, aria, nested_button, sibling_combobox,
+         react_select, mui, antd) = _trigger_selectors(target_label)
         dropdown_triggers = [
+            # Direct CSS first; get_by_role computes accessible names for every node
+            combobox_aria,
             self.page.get_by_role("combobox", name=target_label),
             self.page.get_by_label(target_label),
-            self.page.locator(f'[aria-label*="{target_label}" i]'),
-            self.page.locator(f'div:has-text("{target_label}") >> [role="button"]').first,
-            self.page.locator(f'label:has-text("{target_label}") ~ div >> [role="combobox"]'),
-            self.page.locator(f'.select__control:has-text("{target_label}")'), # React-Select
-            self.page.locator(f'.MuiSelect-root:has-text("{target_label}")'), # MUI
-            self.page.locator(f'.ant-select-selector:has-text("{target_label}")'), # AntD
-            self.page.locator(f'div:has-text("{target_label}")').last, # Generic
+            aria,  # Plain CSS: probed in-page without a locator round trip
+            self.page.locator(nested_button).first,
+            self.page.locator(sibling_combobox),
+            self.page.locator(react_select),
+            self.page.locator(mui),
+            self.page.locator(antd),
         ]
         
-        dropdown_opened = False
+        if linked is not None:
+            dropdown_triggers.insert(0, linked)
         
-        for trigger in dropdown_triggers:
-            try:
-                if trigger.count() > 0:
-                    scroll_element_into_view(self.page, trigger)
-                    if trigger.first.is_visible():
-                        trigger.first.click(force=True)
-                        time.sleep(0.5) # Wait for animation
-                        dropdown_opened = True
-                        break
-            except Exception:
-                continue
+        def open_action(trigger) -> bool:
+            trigger.click(force=True, timeout=ACTION_TIMEOUT_MS)
+            self._wait_for_menu()
+            return True
         
-        if not dropdown_opened:
-            # Retry with scroll
-            self.page.mouse.wheel(0, 300)
-            time.sleep(0.3)
-            for trigger in dropdown_triggers:
-                try:
-                    if trigger.count() > 0 and trigger.first.is_visible():
-                        trigger.first.click(force=True)
-                        time.sleep(0.5)
-                        dropdown_opened = True
-                        break
-                except:
-                    continue
+        # Scroll-and-retry is handled by _try_locators
+        if not self._try_locators(dropdown_triggers, open_action):
+            # Generic: control nearest to the label text
+            self._open_label_trigger(target_label)
 
         # Look for option globally (React Portals)
         if self._click_option(value, value_lower, target_label):
@@ -116,54 +208,77 @@ class DropdownHandler(BaseHandler):
             
         return False
     
+    def _open_label_trigger(self, target_label: str) -> bool:
+        """Click the dropdown control nearest to the label text, if any."""
+        try:
+            handle = self.page.evaluate_handle(_LABEL_TRIGGER_JS, target_label)
+            trigger = handle.as_element()
+            if trigger is None:
+                return False
+            trigger.click(force=True, timeout=ACTION_TIMEOUT_MS)
+            self._wait_for_menu()
+            return True
+        except Exception:
+            return False
+    
+    def _iter_option_locators(self, value: str):
+        """
+        Yield option locators lazily, so a first-hit match never builds the rest.
+        
+        Priority: Exact match -> Partial match
+        """
+        aria_option, *text_options = _option_selectors(value)
+        # High confidence: Role + exact label, CSS before the accessibility scan
+        yield self.page.locator(aria_option)
+        yield self.page.get_by_role("option", name=value, exact=True)
+        yield self.page.get_by_text(value, exact=True)
+        # Contains-text and framework-specific matches
+        for selector in text_options:
+            yield self.page.locator(selector)
+    
     def _click_option(self, value: str, value_lower: str, target_label: str) -> bool:
         """Search globally for the option and click it."""
-        
-        # Priority: Exact match -> Partial match
-        option_locators = [
-            # High confidence: Role + Exact Text
-            self.page.get_by_role("option", name=value, exact=True),
-            self.page.get_by_text(value, exact=True),
-            
-            # Medium confidence: Role + Contains Text
-            self.page.locator(f'[role="option"]:has-text("{value}")'),
-            self.page.locator(f'[role="menuitem"]:has-text("{value}")'),
-            self.page.locator(f'li:has-text("{value}")'),
-            
-            # Framework specific
-            self.page.locator(f'.select__option:has-text("{value}")'), # React-Select
-            self.page.locator(f'.MuiMenuItem-root:has-text("{value}")'), # MUI
-            self.page.locator(f'.ant-select-item-option-content:has-text("{value}")'), # AntD
-            
-            # Generic
-            self.page.locator(f'div[id*="option"]:has-text("{value}")'),
-            self.page.locator(f'div:has-text("{value}")'),
-        ]
-        
-        for locator in option_locators:
+        for locator in self._iter_option_locators(value):
             try:
-                # Iterate all matches (some might be hidden/duplicates)
-                count = locator.count()
-                for i in range(min(count, 10)): # Check first 10 matches
-                    element = locator.nth(i)
-                    if element.is_visible():
-                        element.scroll_into_view_if_needed()
-                        element.click(force=True)
-                        self._log_success("Selected", value, f"dropdown '{target_label}'")
-                        return True
+                # Some matches might be hidden/duplicates: pick the first visible
+                # one client-side instead of an is_visible() round trip per match
+                index = locator.evaluate_all(_FIRST_VISIBLE_JS, 10) # Check first 10 matches
+                if index >= 0:
+                    element = locator.nth(index)
+                    element.scroll_into_view_if_needed(timeout=ACTION_TIMEOUT_MS)
+                    element.click(force=True, timeout=ACTION_TIMEOUT_MS)
+                    self._log_success("Selected", value, f"dropdown '{target_label}'")
+                    return True
             except Exception:
                 continue
                 
         return False
 
+    def _wait_for_menu(self, timeout_ms: int = PROBE_TIMEOUT_MS) -> bool:
+        """
+        Wait until a dropdown menu is rendered instead of sleeping a fixed time.
+        
+        Args:
+            timeout_ms: Maximum wait in milliseconds
+            
+        Returns:
+            True if a menu became visible in time
+        """
+        try:
+            self.page.wait_for_selector(_MENU_SELECTOR, state="visible", timeout=timeout_ms)
+            return True
+        except Exception:
+            return False
+
     def _handle_keyboard_select(self, target_label: str, value: str) -> bool:
         try:
             field = self.page.get_by_label(target_label)
             if field.count() > 0:
-                field.first.click()
-                time.sleep(0.2)
+                field.first.click(timeout=ACTION_TIMEOUT_MS)
+                self._wait_for_menu()
                 self.page.keyboard.type(value, delay=50)
-                time.sleep(0.5)
+                # Filtered options render into the same menu
+                self._wait_for_menu()
                 self.page.keyboard.press("Enter")
                 self._log_success("Selected", value, "keyboard navigation")
                 return True
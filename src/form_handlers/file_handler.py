@@ -2,11 +2,34 @@
 File Handler - Handles file uploads (resume, cover letter, etc.).
 """
 
+import functools
 import time
 from pathlib import Path
 from typing import Optional
 from playwright.sync_api import Page
-from .base import BaseHandler, scroll_element_into_view
+from .base import UPLOAD_TIMEOUT_MS, BaseHandler, build_selector, scroll_element_into_view
+
+
+# Label-independent file input selectors
+_RESUME_INPUT_SELECTORS = (
+    'input[type="file"][name*="resume" i]',
+    'input[type="file"][id*="resume" i]',
+    'input[type="file"][accept*="pdf"]',
+)
+_COVER_INPUT_SELECTORS = (
+    'input[type="file"][name*="cover" i]',
+    'input[type="file"][id*="cover" i]',
+)
+
+
+@functools.lru_cache(maxsize=128)
+def _label_file_selectors(target_label: str) -> tuple:
+    """Selectors for a file input tied to a label: (inside label, after label, aria-label)."""
+    return (
+        build_selector("label_inner", target_label, 'input[type="file"]'),
+        build_selector("label_sibling", target_label, 'input[type="file"]'),
+        build_selector("aria_inner", target_label, 'input[type="file"]'),
+    )
 
 
 class FileHandler(BaseHandler):
@@ -38,6 +61,26 @@ class FileHandler(BaseHandler):
         self.resume_path = resume_path
         self.cover_letter_path = cover_letter_path
     
+    def _upload_resolved(self, target_label: str, file_path: Path) -> bool:
+        """
+        Upload through the file input the in-browser resolver picks for a label.
+        
+        Args:
+            target_label: Label, aria-label, name or id text of the input
+            file_path: File to upload
+            
+        Returns:
+            True if a matching input was found and set
+        """
+        resolved = self._resolve("upload", target_label)
+        if resolved["status"] != "found":
+            return False
+        try:
+            self.page.locator(resolved["selector"]).set_input_files(str(file_path), timeout=UPLOAD_TIMEOUT_MS)
+            return True
+        except Exception:
+            return False
+    
     def upload_resume(self, action: dict = None) -> bool:
         """
         Upload resume file.
@@ -54,21 +97,50 @@ class FileHandler(BaseHandler):
         
         target_label = action.get('target_label', 'Resume') if action else 'Resume'
         
+        # Common case: a single file input on the page - no disambiguation needed
+        file_inputs = self.page.locator('input[type="file"]')
+        try:
+            count = file_inputs.count()
+        except Exception:
+            count = -1
+        if count == 0:
+            self._log_warning("Could not find file input for resume")
+            return False
+        if count == 1:
+            try:
+                file_inputs.set_input_files(str(self.resume_path), timeout=UPLOAD_TIMEOUT_MS)
+                self._log_success("Uploaded resume", self.resume_path.name, "only file input")
+                return True
+            except Exception:
+                pass
+        
+        # One-pass resolver: label, aria-label, then name/id
+        if self._upload_resolved(target_label, self.resume_path):
+            self._log_success("Uploaded resume", self.resume_path.name)
+            return True
+        
+        def set_resume(element) -> bool:
+            element.set_input_files(str(self.resume_path), timeout=UPLOAD_TIMEOUT_MS)
+            return True
+        
+        # Attribute-matched inputs are plain CSS: probe them in one round trip
+        if self._try_css_selectors(list(_RESUME_INPUT_SELECTORS), set_resume, require_visible=False):
+            self._log_success("Uploaded resume", self.resume_path.name)
+            return True
+        
         # Try to find specific resume file input
+        inside_label, after_label, _ = _label_file_selectors(target_label)
         resume_locators = [
-            self.page.locator('input[type="file"][name*="resume" i]'),
-            self.page.locator('input[type="file"][id*="resume" i]'),
-            self.page.locator('input[type="file"][accept*="pdf"]'),
-            self.page.locator(f'label:has-text("{target_label}") input[type="file"]'),
-            self.page.locator(f'label:has-text("{target_label}") ~ input[type="file"]'),
+            self.page.locator(inside_label),
+            self.page.locator(after_label),
             # Generic - first file input (usually resume)
-            self.page.locator('input[type="file"]').first,
+            file_inputs.first,
         ]
         
         for locator in resume_locators:
             try:
                 if locator.count() > 0:
-                    locator.first.set_input_files(str(self.resume_path))
+                    locator.first.set_input_files(str(self.resume_path), timeout=UPLOAD_TIMEOUT_MS)
                     self._log_success("Uploaded resume", self.resume_path.name)
                     return True
             except Exception:
@@ -102,18 +174,31 @@ class FileHandler(BaseHandler):
             return False
         
         try:
+            # One-pass resolver: label, aria-label, then name/id
+            if self._upload_resolved(target_label, self.cover_letter_path):
+                self._log_success("Uploaded cover letter", self.cover_letter_path.name)
+                return True
+            
+            def set_cover_letter(element) -> bool:
+                element.set_input_files(str(self.cover_letter_path), timeout=UPLOAD_TIMEOUT_MS)
+                return True
+            
+            # Attribute-matched inputs are plain CSS: probe them in one round trip
+            if self._try_css_selectors(list(_COVER_INPUT_SELECTORS), set_cover_letter, require_visible=False):
+                self._log_success("Uploaded cover letter", self.cover_letter_path.name)
+                return True
+            
             # Try specific cover letter input
+            inside_label, after_label, _ = _label_file_selectors(target_label)
             cover_locators = [
-                self.page.locator('input[type="file"][name*="cover" i]'),
-                self.page.locator('input[type="file"][id*="cover" i]'),
-                self.page.locator(f'label:has-text("{target_label}") input[type="file"]'),
-                self.page.locator(f'label:has-text("{target_label}") ~ input[type="file"]'),
+                self.page.locator(inside_label),
+                self.page.locator(after_label),
             ]
             
             for locator in cover_locators:
                 try:
                     if locator.count() > 0:
-                        locator.first.set_input_files(str(self.cover_letter_path))
+                        locator.first.set_input_files(str(self.cover_letter_path), timeout=UPLOAD_TIMEOUT_MS)
                         self._log_success("Uploaded cover letter", self.cover_letter_path.name)
                         return True
                 except Exception:
@@ -121,12 +206,12 @@ class FileHandler(BaseHandler):
             
             # If multiple file inputs, cover letter is usually second
             if count >= 2:
-                file_inputs.nth(1).set_input_files(str(self.cover_letter_path))
+                file_inputs.nth(1).set_input_files(str(self.cover_letter_path), timeout=UPLOAD_TIMEOUT_MS)
                 self._log_success("Uploaded cover letter", self.cover_letter_path.name, "second file input")
                 return True
             
             # Last resort: use the only file input
-            file_inputs.first.set_input_files(str(self.cover_letter_path))
+            file_inputs.first.set_input_files(str(self.cover_letter_path), timeout=UPLOAD_TIMEOUT_MS)
             self._log_success("Uploaded cover letter", self.cover_letter_path.name)
             return True
             
@@ -163,17 +248,23 @@ class FileHandler(BaseHandler):
             self._log_warning(f"File not found: {file_path}")
             return False
         
+        # One-pass resolver: label, aria-label, then name/id
+        if self._upload_resolved(target_label, file_path):
+            self._log_success("Uploaded", file_path.name, target_label)
+            return True
+        
         # Find file input by label
-        locators = [
-            self.page.locator(f'label:has-text("{target_label}") input[type="file"]'),
-            self.page.locator(f'label:has-text("{target_label}") ~ input[type="file"]'),
-            self.page.locator(f'[aria-label*="{target_label}" i] input[type="file"]'),
-        ]
+        locators = [self.page.locator(selector) for selector in _label_file_selectors(target_label)]
+        
+        # Direct hit through <label for>, ahead of the selector ladder
+        linked = self._locate_by_label_for(target_label)
+        if linked is not None:
+            locators.insert(0, linked)
         
         for locator in locators:
             try:
                 if locator.count() > 0:
-                    locator.first.set_input_files(str(file_path))
+                    locator.first.set_input_files(str(file_path), timeout=UPLOAD_TIMEOUT_MS)
                     self._log_success("Uploaded", file_path.name, target_label)
                     return True
             except Exception:
@@ -2,29 +2,193 @@
 Form Controller - Unified action router for all form handlers.
 """
 
-import time
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from playwright.sync_api import Page
-from rich.console import Console
 
-from .base import BaseHandler
+from .base import ACTION_TIMEOUT_MS, BaseHandler, first_visible
 from .input_handler import InputHandler
 from .checkbox_handler import CheckboxHandler
 from .radio_handler import RadioHandler
 from .dropdown_handler import DropdownHandler
 from .file_handler import FileHandler
+from .._console import console
 
-console = Console()
+
+# Ranks visible clickables against the label in one pass (exact aria-label,
+# exact text, contained text on button/link/input, contained text elsewhere),
+# scrolls the winner into view and tags it with a fresh data-pw-click-id.
+_FIND_CLICK_TARGET_JS = """
+(label) => {
+    const norm = s => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    const needle = norm(label);
+    if (!needle) return null;
+    const candidates = document.querySelectorAll(
+        'button, a, [role="button"], input[type="submit"], input[type="button"], ' +
+        '[aria-label], [onclick], [tabindex]:not([tabindex="-1"])');
+    let best = null;
+    let bestRank = Infinity;
+    for (const el of candidates) {
+        const r = el.getBoundingClientRect();
+        if (r.width === 0 || r.height === 0) continue;
+        const aria = norm(el.getAttribute('aria-label'));
+        const text = norm(el.innerText || el.value);
+        let rank;
+        if (aria === needle) rank = 0;
+        else if (text === needle) rank = 1;
+        else if (text.includes(needle) || aria.includes(needle)) {
+            rank = el.matches('button, a, input, [role="button"]') ? 2 : 3;
+        } else continue;
+        if (rank < bestRank) {
+            best = el;
+            bestRank = rank;
+            if (rank === 0) break;
+        }
+    }
+    if (!best) return null;
+    best.scrollIntoView({ block: 'center' });
+    window.__clickSeq = (window.__clickSeq || 0) + 1;
+    const id = String(window.__clickSeq);
+    best.setAttribute('data-pw-click-id', id);
+    return id;
+}
+"""
+
+
+# Action types that navigate, scroll or otherwise change what is on screen;
+# everything else can be applied to the current document in one evaluate
+_PAGE_CHANGING_TYPES = frozenset({'click', 'scroll_down', 'scroll_up', 'wait'})
+
+
+# Applies a run of fill/check/radio/select actions in one round trip. Each
+# entry is {type, label, value}, plus optional fallback labels for fills;
+# returns one boolean per entry. Fields are
+# resolved by label[for] / wrapping / following label, then aria-label,
+# placeholder and name/id. Autocomplete inputs are left to InputHandler (it
+# picks the suggestion), and anything unresolved comes back false so the
+# caller can retry it through the regular handler.
+_BATCH_FILL_JS = """
+(actions) => {
+    const norm = s => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    const FIELD = 'textarea, input:not([type="hidden"]):not([type="checkbox"])' +
+        ':not([type="radio"]):not([type="file"]):not([type="submit"]):not([type="button"])';
+    const visible = el => {
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0;
+    };
+    
+    const findField = (label, accept) => {
+        const needle = norm(label);
+        if (!needle) return null;
+        const compact = needle.replace(/[\\s_-]/g, '');
+        for (const lab of document.querySelectorAll('label')) {
+            if (!norm(lab.textContent).includes(needle)) continue;
+            const candidates = [
+                lab.htmlFor ? document.getElementById(lab.htmlFor) : null,
+                lab.querySelector(FIELD),
+                lab.nextElementSibling,
+            ];
+            const hit = candidates.find(el => el && el.matches(FIELD) && visible(el) && accept(el));
+            if (hit) return hit;
+        }
+        for (const el of document.querySelectorAll(FIELD)) {
+            if (!visible(el) || !accept(el)) continue;
+            if (norm(el.getAttribute('aria-label')).includes(needle)) return el;
+            if (norm(el.getAttribute('placeholder')).includes(needle)) return el;
+            const key = ((el.name || '') + (el.id || '')).toLowerCase().replace(/[\\s_-]/g, '');
+            if (compact && key.includes(compact)) return el;
+        }
+        return null;
+    };
+    
+    // Fallback labels are looser, so they only ever land on empty fields
+    const fill = (label, value, fallback) => {
+        const el = findField(label, fallback ? (el => !el.value) : (() => true));
+        if (!el) return false;
+        // Suggestion lists need the per-field flow
+        if (el.getAttribute('role') === 'combobox' || el.hasAttribute('list') ||
+            ['list', 'both'].includes(el.getAttribute('aria-autocomplete'))) return false;
+        el.scrollIntoView({ block: 'center' });
+        el.focus();
+        // Native setter so controlled components (React etc.) see the change
+        const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement : HTMLInputElement;
+        Object.getOwnPropertyDescriptor(proto.prototype, 'value').set.call(el, value);
+        el.dispatchEvent(new Event('input', { bubbles: true }));
+        el.dispatchEvent(new Event('change', { bubbles: true }));
+        return el.value === value;
+    };
+    
+    const radio = (value) => {
+        const needle = norm(value);
+        if (!needle) return false;
+        for (const el of document.querySelectorAll('label, [role="radio"]')) {
+            if (norm(el.textContent) !== needle) continue;
+            el.scrollIntoView({ block: 'center' });
+            el.click();
+            return true;
+        }
+        for (const input of document.querySelectorAll('input[type="radio"]')) {
+            if (input.value.toLowerCase() !== needle) continue;
+            // Hidden custom-styled inputs are clicked through their wrapper
+            const target = input.offsetParent === null && input.parentElement ? input.parentElement : input;
+            target.scrollIntoView({ block: 'center' });
+            target.click();
+            return true;
+        }
+        return false;
+    };
+    
+    return actions.map(action => {
+        try {
+            switch (action.type) {
+                case 'fill': return fill(action.label, action.value, false) ||
+                    (action.labels || []).some(label => fill(label, action.value, true));
+                case 'check': return !!(window.__formBot.checkFound(action.label) || {}).checked;
+                case 'radio': return radio(action.value);
+                case 'select': return window.__formBot.resolve(action).status === 'done';
+                default: return false;
+            }
+        } catch (e) {
+            return false;
+        }
+    });
+}
+"""
+
+
+def is_page_changing(action: dict) -> bool:
+    """
+    Whether an action can change the page under a pending batch.
+    
+    Args:
+        action: Action dictionary with type
+        
+    Returns:
+        True for clicks, uploads, scrolls and waits
+    """
+    action_type = action.get('type', '')
+    return action_type in _PAGE_CHANGING_TYPES or action_type.startswith('upload')
 
 
 class FormController:
     """
     Unified controller that routes actions to appropriate handlers.
     
+    Actions run one at a time. The sync Playwright API is bound to the thread
+    that started it, and fields on a page share focus, scroll position and
+    open popups, so overlapping two field interactions is not safe. Per-field
+    latency is reduced inside the handlers instead (batched probes, event-driven
+    waits).
+    
+    Separate pages can run in parallel only if each has its own Playwright
+    instance, started in the thread or process that drives it: give every
+    job its own browser and FormController there. Controllers (and pages)
+    must never be shared across threads.
+    
     Usage:
         controller = FormController(page, resume_path, cover_letter_path, cover_letter_text)
         success = controller.execute(action_dict)
+        results = controller.execute_batch([action_dict, ...])
     """
     
     def __init__(
@@ -32,7 +196,8 @@ class FormController:
         page: Page,
         resume_path: Optional[Path] = None,
         cover_letter_path: Optional[Path] = None,
-        cover_letter_text: Optional[str] = None
+        cover_letter_text: Optional[str] = None,
+        verbose: bool = True
     ):
         """
         Initialize form controller with all handlers.
@@ -42,6 +207,8 @@ class FormController:
             resume_path: Path to resume file
             cover_letter_path: Path to cover letter file
             cover_letter_text: Cover letter text content
+            verbose: Print a line per successful action; when False only
+                warnings/errors are printed and batches end with one summary
         """
         self.page = page
         
@@ -51,6 +218,20 @@ class FormController:
         self.radio_handler = RadioHandler(page)
         self.dropdown_handler = DropdownHandler(page)
         self.file_handler = FileHandler(page, resume_path, cover_letter_path)
+        
+        self.verbose = verbose
+    
+    @property
+    def verbose(self) -> bool:
+        """Whether successful actions are logged (shared with all handlers)."""
+        return self._verbose
+    
+    @verbose.setter
+    def verbose(self, value: bool):
+        self._verbose = value
+        for handler in (self.input_handler, self.checkbox_handler, self.radio_handler,
+                        self.dropdown_handler, self.file_handler):
+            handler.verbose = value
     
     def execute(self, action: dict) -> bool:
         """
@@ -82,6 +263,9 @@ class FormController:
         handler = handlers.get(action_type)
         if handler:
             try:
+                # Plain labelled fields are set in one evaluate; fill() handles the rest
+                if action_type == 'fill' and self.input_handler.fill_fast(action):
+                    return True
                 return handler(action)
             except Exception as e:
                 console.print(f"[red]✗ Action '{action_type}' failed: {e}[/red]")
@@ -90,6 +274,83 @@ class FormController:
         console.print(f"[yellow]⚠ Unknown action type: {action_type}[/yellow]")
         return False
     
+    def execute_batch(self, actions: List[dict], fallback: bool = True) -> List[bool]:
+        """
+        Execute a list of actions, applying runs of field actions in one round trip.
+        
+        Adjacent fill/check/radio/select actions are sent to the page together.
+        Clicks, uploads, scrolls and waits flush the pending run and go through
+        execute() as usual, and so does any batched action the page could not
+        resolve, so the outcome matches calling execute() one action at a time.
+        
+        A fill may list extra labels under 'alt_labels'; the page tries them in
+        order within the same round trip.
+        
+        Args:
+            actions: Action dictionaries in execution order
+            fallback: Retry unresolved field actions through execute(); when
+                False they are reported as failed (speculative fills)
+            
+        Returns:
+            One success flag per action, in the same order
+        """
+        results = [False] * len(actions)
+        pending: List[int] = []
+        
+        def flush():
+            if pending:
+                for index, ok in zip(pending, self._apply_batch([actions[i] for i in pending])):
+                    results[index] = ok or (fallback and self.execute(actions[index]))
+                pending.clear()
+        
+        for index, action in enumerate(actions):
+            if is_page_changing(action):
+                flush()
+                results[index] = self.execute(action)
+            else:
+                pending.append(index)
+        flush()
+        
+        if not self.verbose and results:
+            console.print(f"[green]✓ Batch: {sum(results)}/{len(results)} actions succeeded[/green]")
+        return results
+    
+    def _apply_batch(self, actions: List[dict]) -> List[bool]:
+        """
+        Apply field actions to the current document in a single evaluate.
+        
+        Args:
+            actions: Non page-changing action dictionaries
+            
+        Returns:
+            One flag per action; False means it still needs its handler
+        """
+        payload = []
+        for action in actions:
+            label = action.get('target_label', '')
+            value = str(action.get('value', '') or '')
+            if action.get('type') == 'fill' and self.input_handler.cover_letter_text \
+                    and self.input_handler._is_cover_letter_field(label):
+                value = self.input_handler.cover_letter_text
+            elif action.get('type') == 'radio' and not value:
+                value = label
+            entry = {'type': action.get('type', ''), 'label': label, 'value': value}
+            if action.get('alt_labels'):
+                entry['labels'] = list(action['alt_labels'])
+            payload.append(entry)
+        
+        try:
+            applied = self.page.evaluate(_BATCH_FILL_JS, payload)
+        except Exception as e:
+            console.print(f"[dim]Batch apply failed, running actions one by one: {e}[/dim]")
+            return [False] * len(actions)
+        
+        verbs = {'fill': 'Filled', 'check': 'Checked', 'radio': 'Selected radio', 'select': 'Selected'}
+        for entry, ok in zip(payload, applied):
+            if ok:
+                self._log_success(f"{verbs.get(entry['type'], 'Applied')} '{entry['label']}' (batched)")
+        return [bool(ok) for ok in applied]
+    
     def _handle_click(self, action: dict) -> bool:
         """
         Handle click actions (buttons, links).
@@ -102,63 +363,44 @@ class FormController:
         """
         target_label = action.get('target_label', '')
         
+        # One DOM scan ranks every candidate and tags the winner
+        if self._click_resolved(target_label):
+            self._log_success(f"Clicked '{target_label}'")
+            return True
+        
+        # Accessible-name matching for controls the scan could not rank
         locators = [
             self.page.get_by_role("button", name=target_label),
             self.page.get_by_role("link", name=target_label),
             self.page.get_by_text(target_label, exact=True),
-            self.page.get_by_text(target_label),
-            self.page.locator(f'[aria-label="{target_label}"]'),
-            self.page.locator(f'button:has-text("{target_label}")'),
-            self.page.locator(f'a:has-text("{target_label}")'),
-            self.page.locator(f'[role="button"]:has-text("{target_label}")'),
         ]
         
         for locator in locators:
+            element = first_visible(locator)
+            if element is None:
+                continue
             try:
-                if locator.count() > 0:
-                    from .base import scroll_element_into_view
-                    scroll_element_into_view(self.page, locator)
-                    if locator.first.is_visible():
-                        locator.first.click(force=True)
-                        console.print(f"[green]✓ Clicked '{target_label}'[/green]")
-                        return True
+                # click() scrolls the element into view itself
+                element.click(force=True, timeout=ACTION_TIMEOUT_MS)
+                self._log_success(f"Clicked '{target_label}'")
+                return True
             except Exception:
                 continue
         
-        # Scroll down and retry
+        # Scroll down and rescan (lazy-rendered sections)
         self.page.mouse.wheel(0, 400)
-        time.sleep(0.5)
-        
-        for locator in locators:
-            try:
-                if locator.count() > 0:
-                    from .base import scroll_element_into_view
-                    scroll_element_into_view(self.page, locator)
-                    if locator.first.is_visible():
-                        locator.first.click(force=True)
-                        console.print(f"[green]✓ Clicked '{target_label}' (after scroll)[/green]")
-                        return True
-            except Exception:
-                continue
+        try:
+            self.page.wait_for_load_state("networkidle", timeout=500)
+        except Exception:
+            pass
+        if self._click_resolved(target_label):
+            self._log_success(f"Clicked '{target_label}' (after scroll)")
+            return True
         
-        # JavaScript fallback
+        # JavaScript fallback (window.__formBot.clickByText, see base.py)
         try:
-            js_result = self.page.evaluate(f'''
-                () => {{
-                    const elements = document.querySelectorAll('button, a, [role="button"], input[type="submit"]');
-                    for (const el of elements) {{
-                        if (el.textContent.toLowerCase().includes("{target_label.lower()}") ||
-                            el.getAttribute('aria-label')?.toLowerCase().includes("{target_label.lower()}")) {{
-                            el.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
-                            el.click();
-                            return true;
-                        }}
-                    }}
-                    return false;
-                }}
-            ''')
-            if js_result:
-                console.print(f"[green]✓ Clicked '{target_label}' (JS fallback)[/green]")
+            if self.page.evaluate("(needle) => window.__formBot.clickByText(needle)", target_label.lower()):
+                self._log_success(f"Clicked '{target_label}' (JS fallback)")
                 return True
         except Exception:
             pass
@@ -166,20 +408,48 @@ class FormController:
         console.print(f"[yellow]⚠ Could not find button/link: {target_label}[/yellow]")
         return False
     
+    def _click_resolved(self, target_label: str) -> bool:
+        """
+        Click the best visible match found by a single in-page scan.
+        
+        Args:
+            target_label: Button/link text or aria-label
+            
+        Returns:
+            True if a candidate was found and clicked
+        """
+        try:
+            click_id = self.page.evaluate(_FIND_CLICK_TARGET_JS, target_label)
+            if not click_id:
+                return False
+            self.page.locator(f'[data-pw-click-id="{click_id}"]').click(force=True, timeout=ACTION_TIMEOUT_MS)
+            return True
+        except Exception:
+            return False
+    
+    def _log_success(self, message: str):
+        """Log a successful action unless running quietly."""
+        if self.verbose:
+            console.print(f"[green]✓ {message}[/green]")
+    
     def _scroll_down(self, action: dict = None) -> bool:
         """Scroll the page down."""
         self.page.mouse.wheel(0, 500)
-        console.print("[green]✓ Scrolled down[/green]")
+        self._log_success("Scrolled down")
         return True
     
     def _scroll_up(self, action: dict = None) -> bool:
         """Scroll the page up."""
         self.page.mouse.wheel(0, -500)
-        console.print("[green]✓ Scrolled up[/green]")
+        self._log_success("Scrolled up")
         return True
     
     def _wait(self, action: dict = None) -> bool:
-        """Wait for a moment."""
-        time.sleep(2)
-        console.print("[green]✓ Waited[/green]")
+        """Wait for pending network activity to settle (at most timeout_ms, default 2 s)."""
+        timeout_ms = (action or {}).get('timeout_ms', 2000)
+        try:
+            self.page.wait_for_load_state("networkidle", timeout=timeout_ms)
+        except Exception:
+            pass
+        self._log_success("Waited")
         return True
@@ -2,10 +2,179 @@
 Input Handler - Handles text inputs, textareas, and autocomplete suggestions.
 """
 
-import time
+import functools
 from typing import Optional
 from playwright.sync_api import Page
-from .base import BaseHandler, scroll_element_into_view
+from .base import BaseHandler, build_selector
+
+
+# Containers that autocomplete widgets render their suggestions into
+_SUGGESTION_SELECTORS = [
+    '[role="listbox"]',
+    '.pac-container',  # Google Maps
+    '.ui-menu',        # jQuery UI
+    '.dropdown-menu',  # Bootstrap
+    'div[class*="suggestions"]',
+    'div[class*="results"]',
+    'div[class*="option-list"]',
+    'ul[class*="list"]',
+]
+# Any of the above, rendered (the priority order is applied in-page)
+_SUGGESTION_BOX_SELECTOR = ", ".join(f"{selector}:visible" for selector in _SUGGESTION_SELECTORS)
+
+# How long a fill waits for an autocomplete list to appear
+SUGGESTION_TIMEOUT_MS = 400
+
+
+# Fills the input/textarea tied to a label (label[for], nested, next sibling)
+_FILL_BY_LABEL_JS = """
+(args) => {
+    const { label, value } = args;
+    const needle = label.toLowerCase();
+    if (!needle) return false;
+    for (const lab of document.querySelectorAll('label')) {
+        if (!lab.textContent.toLowerCase().includes(needle)) continue;
+        const forAttr = lab.getAttribute('for');
+        let input = forAttr ? document.getElementById(forAttr) : null;
+        if (!input) input = lab.querySelector('input, textarea');
+        if (!input) input = lab.nextElementSibling;
+        if (input && (input.tagName === 'INPUT' || input.tagName === 'TEXTAREA')) {
+            input.scrollIntoView({ behavior: 'smooth', block: 'center' });
+            input.focus();
+            input.value = value;
+            input.dispatchEvent(new Event('input', { bubbles: true }));
+            input.dispatchEvent(new Event('change', { bubbles: true }));
+            return true;
+        }
+    }
+    return false;
+}
+"""
+
+
+# Fast path for fill: label[for] -> #id, then an input nested in the label, then
+# the one right after it. Sets the value with the native setter (so React-style
+# controlled inputs notice) and fires input/change. No visibility or
+# actionability checks, and autocomplete inputs are declined so the regular
+# path can pick their suggestion. Returns {ok, tag}.
+_FIND_AND_SET_JS = """
+(args) => {
+    const { label, value } = args;
+    const needle = label.replace(/\\s+/g, ' ').trim().toLowerCase();
+    if (!needle) return { ok: false };
+    const TEXT = 'textarea, input:not([type="hidden"]):not([type="checkbox"])' +
+        ':not([type="radio"]):not([type="file"]):not([type="submit"]):not([type="button"])';
+    const isText = el => !!el && el.matches(TEXT) && !el.disabled && !el.readOnly;
+    
+    for (const lab of document.querySelectorAll('label')) {
+        if (!lab.textContent.replace(/\\s+/g, ' ').toLowerCase().includes(needle)) continue;
+        const input = [
+            lab.htmlFor ? document.getElementById(lab.htmlFor) : null,
+            lab.querySelector(TEXT),
+            lab.nextElementSibling,
+        ].find(isText);
+        if (!input) continue;
+        if (input.getAttribute('role') === 'combobox' || input.hasAttribute('list') ||
+            ['list', 'both'].includes(input.getAttribute('aria-autocomplete'))) {
+            return { ok: false };
+        }
+        const proto = input instanceof HTMLTextAreaElement ? HTMLTextAreaElement : HTMLInputElement;
+        Object.getOwnPropertyDescriptor(proto.prototype, 'value').set.call(input, value);
+        input.dispatchEvent(new Event('input', { bubbles: true }));
+        input.dispatchEvent(new Event('change', { bubbles: true }));
+        return { ok: input.value === value, tag: input.tagName.toLowerCase() };
+    }
+    return { ok: false };
+}
+"""
+
+
+# Picks a suggestion in the first visible container: exact text, then partial
+# (case-insensitive), then the first option. The pick is tagged so Python can
+# click it; returns {id, match} or null.
+_PICK_SUGGESTION_JS = """
+(args) => {
+    const { selectors, value } = args;
+    const visible = el => {
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+    };
+    let box = null;
+    for (const selector of selectors) {
+        box = Array.from(document.querySelectorAll(selector)).find(visible);
+        if (box) break;
+    }
+    if (!box) return null;
+    
+    const text = el => (el.textContent || '').replace(/\\s+/g, ' ').trim();
+    // Innermost visible element whose text satisfies the test
+    const innermost = test => {
+        let hit = Array.from(box.querySelectorAll('*')).find(el => visible(el) && test(text(el)));
+        if (!hit) return null;
+        for (let child; (child = Array.from(hit.children).find(c => visible(c) && test(text(c)))); ) {
+            hit = child;
+        }
+        return hit;
+    };
+    const wanted = value.replace(/\\s+/g, ' ').trim();
+    const lower = wanted.toLowerCase();
+    
+    let match = 'exact';
+    let option = wanted ? innermost(t => t === wanted) : null;
+    if (!option && lower) {
+        match = 'partial';
+        option = innermost(t => t.toLowerCase().includes(lower));
+    }
+    if (!option) {
+        match = 'first';
+        option = Array.from(box.querySelectorAll('[role="option"], li, .pac-item')).find(visible);
+    }
+    if (!option) return null;
+    window.__formSuggestionSeq = (window.__formSuggestionSeq || 0) + 1;
+    const id = String(window.__formSuggestionSeq);
+    option.setAttribute('data-form-suggestion', id);
+    return { id, match };
+}
+"""
+
+
+@functools.lru_cache(maxsize=256)
+def _input_selectors(target_label: str, target_lower: str) -> tuple:
+    """
+    Build the selector strategies for a text field once per label.
+    
+    Args:
+        target_label: Label text as given by the model
+        target_lower: Normalized label used for name/id matching
+        
+    Returns:
+        Tuple of (plain CSS selectors, label-adjacent selector list,
+        text-container selector)
+    """
+    css_selectors = (
+        build_selector("name_contains", target_lower, 'textarea'),
+        build_selector("id_contains", target_lower, 'textarea'),
+        build_selector("name_contains", target_lower, 'input'),
+        build_selector("id_contains", target_lower, 'input'),
+        build_selector("aria_contains", target_label),
+    )
+    label_adjacent = ", ".join((
+        build_selector("label_plus", target_label, 'input'),
+        build_selector("label_plus", target_label, 'textarea'),
+        build_selector("label_sibling", target_label, 'input'),
+        build_selector("label_sibling", target_label, 'div input'),
+    ))
+    text_container = build_selector("text_container", target_label, 'input')
+    return css_selectors, label_adjacent, text_container
+
+
+# Extra textarea selectors for cover letter fields
+_COVER_LETTER_SELECTORS = (
+    'textarea[name*="cover"]',
+    'textarea#cover_letter',
+    'textarea[data-field*="cover"]',
+    'textarea[placeholder*="cover" i]',
+)
 
 
 class InputHandler(BaseHandler):
@@ -19,6 +188,12 @@ class InputHandler(BaseHandler):
     - Email, phone, URL inputs
     """
     
+    PAGE_HELPERS = {
+        "fillByLabel": _FILL_BY_LABEL_JS,
+        "findAndSet": _FIND_AND_SET_JS,
+        "pickSuggestion": _PICK_SUGGESTION_JS,
+    }
+    
     def __init__(self, page: Page, cover_letter_text: Optional[str] = None):
         """
         Initialize input handler.
@@ -30,6 +205,39 @@ class InputHandler(BaseHandler):
         super().__init__(page)
         self.cover_letter_text = cover_letter_text
     
+    def fill_fast(self, action: dict) -> bool:
+        """
+        Set a labelled field's value in a single evaluate, skipping locators.
+        
+        Trades Playwright's visibility/actionability checks for speed, so it
+        only handles plain label-linked fields with a known value; cover
+        letters and autocomplete inputs are left to fill().
+        
+        Args:
+            action: Action dict with target_label and value
+            
+        Returns:
+            True if the value was set; False means use fill()
+        """
+        target_label = action.get('target_label', '')
+        # Models sometimes send numbers; the page and the log both get the text
+        value = action.get('value')
+        value = '' if value is None else str(value)
+        if not value or self._is_cover_letter_field(target_label):
+            return False
+        try:
+            result = self.page.evaluate(
+                "(args) => window.__formBot.findAndSet(args)",
+                {"label": target_label, "value": value}
+            )
+        except Exception:
+            return False
+        if not result or not result.get('ok'):
+            return False
+        display_value = value[:40] + "..." if len(value) > 40 else value
+        self._log_success("Filled", target_label, f"fast path, value={display_value}")
+        return True
+    
     def fill(self, action: dict) -> bool:
         """
         Fill a text input or textarea and handle suggestions if they appear.
@@ -44,67 +252,56 @@ class InputHandler(BaseHandler):
         value = action.get('value', '')
         
         # Check if this is a cover letter field
-        if self._is_cover_letter_field(target_label) and self.cover_letter_text:
+        is_cover_letter = self._is_cover_letter_field(target_label)
+        if is_cover_letter and self.cover_letter_text:
             value = self.cover_letter_text
             self._log_debug("Using loaded cover letter text")
         
         target_lower = self._normalize_label(target_label)
         
-        # Build locator strategies in priority order
+        css_selectors, label_adjacent, text_container = _input_selectors(target_label, target_lower)
+        
+        # Build locator strategies in priority order. Plain CSS goes first:
+        # the whole run is probed in one round trip
         locators = [
-            # Strategy 1: Role-based textbox
+            # Strategies 1-2: Textarea/input by name/id, aria-label
+            *css_selectors,
+            # Strategy 3: Role-based textbox
             self.page.get_by_role("textbox", name=target_label),
-            # Strategy 2: By label association
+            # Strategy 4: By label association
             self.page.get_by_label(target_label),
-            # Strategy 3: By placeholder
+            # Strategy 5: By placeholder
             self.page.get_by_placeholder(target_label),
-            # Strategy 4: Textarea by name/id
-            self.page.locator(f'textarea[name*="{target_lower}"]'),
-            self.page.locator(f'textarea[id*="{target_lower}"]'),
-            # Strategy 5: Input by name/id  
-            self.page.locator(f'input[name*="{target_lower}"]'),
-            self.page.locator(f'input[id*="{target_lower}"]'),
-            # Strategy 6: Aria-label
-            self.page.locator(f'[aria-label*="{target_label}" i]'),
-            # Strategy 7: Adjacent to label (Robust for modern frameworks)
-            self.page.locator(f'label:has-text("{target_label}") + input'),
-            self.page.locator(f'label:has-text("{target_label}") + textarea'),
-            self.page.locator(f'label:has-text("{target_label}") ~ input'),
-            self.page.locator(f'label:has-text("{target_label}") ~ div input'),
-            self.page.locator(f'div:has-text("{target_label}") input'),
+            # Strategy 6: Adjacent to label (Robust for modern frameworks),
+            # one selector list so Playwright walks the labels once
+            self.page.locator(label_adjacent),
+            self.page.locator(text_container),
         ]
         
+        # Direct hit through <label for>, ahead of the selector ladder
+        linked = self._locate_by_label_for(target_label)
+        if linked is not None:
+            locators.insert(0, linked)
+        
         # Add cover-letter specific locators
-        if self._is_cover_letter_field(target_label):
-            locators.extend([
-                self.page.locator('textarea[name*="cover"]'),
-                self.page.locator('textarea#cover_letter'),
-                self.page.locator('textarea[data-field*="cover"]'),
-                self.page.locator('textarea[placeholder*="cover" i]'),
-            ])
-        
-        # Try each locator
-        filled = False
-        for locator in locators:
-            try:
-                if locator.count() > 0:
-                    scroll_element_into_view(self.page, locator)
-                    if locator.first.is_visible():
-                        # Clear and fill
-                        locator.first.fill("")
-                        time.sleep(0.1)
-                        locator.first.fill(value)
-                        filled = True
-                        break
-            except Exception:
-                continue
+        if is_cover_letter:
+            locators.extend(_COVER_LETTER_SELECTORS)
+        
+        def fill_action(element) -> bool:
+            # fill() clears the field itself and waits for it to be editable
+            element.fill(value)
+            return True
+        
+        # The strategy that filled this field last time is tried first
+        cache_key = f"{self.__class__.__name__}:{target_lower}"
+        filled = self._try_locators(locators, fill_action, scroll_retry=False, cache_key=cache_key)
 
         # Last resort for cover letter
-        if not filled and self._is_cover_letter_field(target_label):
+        if not filled and is_cover_letter:
             try:
-                textareas = self.page.locator('textarea:visible')
-                if textareas.count() > 0:
-                    textareas.first.fill(value)
+                textarea = self._first_visible(self.page.locator('textarea:visible'))
+                if textarea is not None:
+                    textarea.fill(value)
                     self._log_success("Filled", "textarea", "cover letter fallback")
                     filled = True
             except Exception:
@@ -130,83 +327,47 @@ class InputHandler(BaseHandler):
         """
         Check if typing triggered a suggestion dropdown and select the matching option.
         """
-        # Wait briefly for network/animation
-        time.sleep(0.8)
-        
-        # Common selectors for suggestion containers
-        suggestion_selectors = [
-            '[role="listbox"]', 
-            '.pac-container',  # Google Maps
-            '.ui-menu',        # jQuery UI
-            '.dropdown-menu',  # Bootstrap
-            'div[class*="suggestions"]',
-            'div[class*="results"]',
-            'div[class*="option-list"]',
-            'ul[class*="list"]'
-        ]
+        # Wait for any container to show up; most fields never open one, and
+        # those return after the timeout instead of a fixed sleep
+        try:
+            self.page.locator(_SUGGESTION_BOX_SELECTOR).first.wait_for(
+                state="visible", timeout=SUGGESTION_TIMEOUT_MS
+            )
+        except Exception:
+            return
         
-        # Look for any visible suggestion box
-        for selector in suggestion_selectors:
-            try:
-                box = self.page.locator(f'{selector}:visible').first
-                if box.count() > 0:
-                    # 1. Try exact match in the list
-                    option = box.locator(f'text="{value}"').first
-                    if option.count() > 0 and option.is_visible():
-                        option.click(force=True)
-                        self._log_success("Selected suggestion", value, "exact match")
-                        return
-
-                    # 2. Try partial match
-                    option = box.locator(f'text={value}').first
-                    if option.count() > 0 and option.is_visible():
-                        option.click(force=True)
-                        self._log_success("Selected suggestion", value, "partial match")
-                        return
-                    
-                    # 3. Fallback: Click the first option (often "Best Match")
-                    first_option = box.locator('[role="option"], li, .pac-item').first
-                    if first_option.count() > 0 and first_option.is_visible():
-                        first_option.click(force=True)
-                        self._log_debug(f"Clicked first suggestion for {value}")
-                        return
-            except Exception:
-                pass
+        try:
+            picked = self.page.evaluate(
+                "(args) => window.__formBot.pickSuggestion(args)",
+                {"selectors": _SUGGESTION_SELECTORS, "value": value}
+            )
+            if not picked:
+                return
+            # A real (forced) click: many suggestion lists react to mousedown
+            self.page.locator(f'[data-form-suggestion="{picked["id"]}"]').click(force=True)
+        except Exception:
+            return
+        
+        if picked["match"] == "first":
+            self._log_debug(f"Clicked first suggestion for {value}")
+        else:
+            self._log_success("Selected suggestion", value, f"{picked['match']} match")
 
-    def _is_cover_letter_field(self, label: str) -> bool:
-        """Check if the field is for cover letter."""
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _is_cover_letter_field(label: str) -> bool:
+        """Check if the field is for cover letter (cached: labels recur across steps)."""
         label_lower = label.lower()
         return 'cover' in label_lower and 'letter' in label_lower
     
     def _fill_with_js(self, target_label: str, value: str) -> bool:
         """Try to fill using JavaScript as fallback."""
         try:
-            js_result = self.page.evaluate(f'''
-                () => {{
-                    const labels = document.querySelectorAll('label');
-                    for (const label of labels) {{
-                        if (label.textContent.toLowerCase().includes("{target_label.lower()}")) {{
-                            const forAttr = label.getAttribute('for');
-                            let input = forAttr ? document.getElementById(forAttr) : null;
-                            if (!input) {{
-                                input = label.querySelector('input, textarea');
-                            }}
-                            if (!input) {{
-                                input = label.nextElementSibling;
-                            }}
-                            if (input && (input.tagName === 'INPUT' || input.tagName === 'TEXTAREA')) {{
-                                input.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
-                                input.focus();
-                                input.value = `{value.replace('`', '\\`').replace('\\n', '\\\\n')}`;
-                                input.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                                input.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                                return true;
-                            }}
-                        }}
-                    }}
-                    return false;
-                }}
-            ''')
+            # Label and value travel as arguments: no quoting or escaping
+            js_result = self.page.evaluate(
+                "(args) => window.__formBot.fillByLabel(args)",
+                {"label": target_label, "value": value}
+            )
             if js_result:
                 self._log_success("Filled", target_label, "JS fallback")
                 return True
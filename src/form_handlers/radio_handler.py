@@ -4,7 +4,58 @@ Radio Handler - Handles radio button selections.
 
 import time
 from playwright.sync_api import Page
-from .base import BaseHandler, scroll_element_into_view
+from .base import BaseHandler, _css_quote, build_selector
+
+
+# Clicks the radio whose label/role text or input value equals the value
+# (case-insensitive); hidden inputs are clicked through their parent
+_SELECT_RADIO_JS = """
+(value) => {
+    const needle = value.toLowerCase();
+    const clickEl = (el) => {
+        el.scrollIntoView({ behavior: 'smooth', block: 'center' });
+        el.click();
+        return true;
+    };
+    
+    // 1. Search labels
+    for (const label of document.querySelectorAll('label, div[role="radio"], span[role="radio"]')) {
+        if (label.textContent.trim().toLowerCase() === needle) return clickEl(label);
+    }
+    
+    // 2. Search inputs by value
+    for (const input of document.querySelectorAll('input[type="radio"]')) {
+        if (input.value.toLowerCase() === needle) {
+            // Try clicking parent label if input is hidden
+            if (input.offsetParent === null && input.parentElement) {
+                return clickEl(input.parentElement);
+            }
+            return clickEl(input);
+        }
+    }
+    return false;
+}
+"""
+
+
+# Partial-match fallback: clicks the first rendered label or ARIA radio whose
+# text contains the value (case-insensitive), in one round trip
+_CLICK_RADIO_TEXT_JS = """
+(value) => {
+    const needle = value.trim().toLowerCase();
+    if (!needle) return false;
+    for (const el of document.querySelectorAll('label, [role="radio"]')) {
+        if (!el.textContent.toLowerCase().includes(needle)) continue;
+        const r = el.getBoundingClientRect();
+        if (r.width > 0 && r.height > 0) {
+            el.scrollIntoView({ block: 'center' });
+            el.click();
+            return true;
+        }
+    }
+    return false;
+}
+"""
 
 
 class RadioHandler(BaseHandler):
@@ -13,6 +64,11 @@ class RadioHandler(BaseHandler):
     Enhanced to handle hidden inputs and custom styled radios.
     """
     
+    PAGE_HELPERS = {
+        "selectRadio": _SELECT_RADIO_JS,
+        "clickRadioText": _CLICK_RADIO_TEXT_JS,
+    }
+    
     def select(self, action: dict) -> bool:
         target_label = action.get('target_label', '')
         value = action.get('value', '')
@@ -20,6 +76,8 @@ class RadioHandler(BaseHandler):
         if not value:
             value = target_label
         
+        quoted = _css_quote(value)
+        
         # Strategies to find the radio button
         locators = [
             # 1. Standard Role
@@ -27,19 +85,27 @@ class RadioHandler(BaseHandler):
             # 2. Label exact match
             self.page.get_by_label(value, exact=True),
             # 3. Input value match
-            self.page.locator(f'input[type="radio"][value="{value}"]'),
+            f'input[type="radio"][value="{quoted}"]',
             # 4. ROBUST: Label containing input
-            self.page.locator(f'label:has(input[value="{value}"])'),
-            # 5. ROBUST: Div/Span container acting as radio
-            self.page.locator(f'div[role="radio"]:has-text("{value}")'),
-            self.page.locator(f'span[role="radio"]:has-text("{value}")'),
-            # 6. Text match (risky but effective)
-            self.page.locator(f'label:has-text("{value}")'),
+            f'label:has(input[value="{quoted}"])',
+            # 5. ROBUST: Any element acting as radio (div, span, button...)
+            self.page.locator(build_selector("has_text", value, '[role="radio"]')),
+            # 6. Option text inside an ARIA radio group
+            self.page.locator('[role="radiogroup"]').get_by_text(value, exact=True),
+            # 7. Radio input inside a container holding the text
+            self.page.locator(build_selector("text_container", value, 'input[type="radio"]')),
+            # 8. Text match (risky but effective)
+            self.page.locator(build_selector("has_text", value, 'label')),
         ]
         
+        # Direct hit through <label for>, ahead of the selector ladder
+        linked = self._locate_by_label_for(value)
+        if linked is not None:
+            locators.insert(0, linked)
+        
         def select_action(element):
             try:
-                scroll_element_into_view(self.page, element)
+                self._ensure_in_view(element)
                 # Try force click first
                 element.click(force=True, timeout=1000)
                 return True
@@ -51,7 +117,8 @@ class RadioHandler(BaseHandler):
                 except:
                     return False
         
-        if self._try_locators(locators, select_action):
+        cache_key = f"{self.__class__.__name__}:{self._normalize_label(value)}"
+        if self._try_locators(locators, select_action, cache_key=cache_key):
             self._log_success("Selected radio", value)
             return True
         
@@ -64,40 +131,14 @@ class RadioHandler(BaseHandler):
     
     def _select_with_js(self, value: str) -> bool:
         try:
-            js_result = self.page.evaluate(f'''
-                () => {{
-                    // Helper to click
-                    const clickEl = (el) => {{
-                        el.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
-                        el.click();
-                        return true;
-                    }};
-
-                    // 1. Search labels
-                    const labels = document.querySelectorAll('label, div[role="radio"], span[role="radio"]');
-                    for (const label of labels) {{
-                        if (label.textContent.trim().toLowerCase() === "{value.lower()}") {{
-                            return clickEl(label);
-                        }}
-                    }}
-                    
-                    // 2. Search inputs by value
-                    const inputs = document.querySelectorAll('input[type="radio"]');
-                    for (const input of inputs) {{
-                        if (input.value.toLowerCase() === "{value.lower()}") {{
-                            // Try clicking parent label if input is hidden
-                            if (input.offsetParent === null && input.parentElement) {{
-                                return clickEl(input.parentElement);
-                            }}
-                            return clickEl(input);
-                        }}
-                    }}
-                    return false;
-                }}
-            ''')
+            js_result = self.page.evaluate("(value) => window.__formBot.selectRadio(value)", value)
             if js_result:
                 self._log_success("Selected radio", value, "JS fallback")
                 return True
+            # Exact text missed: first visible option containing the value
+            if self.page.evaluate("(value) => window.__formBot.clickRadioText(value)", value):
+                self._log_success("Selected radio", value, "partial match")
+                return True
         except Exception:
             pass
         return False
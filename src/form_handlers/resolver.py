@@ -0,0 +1,71 @@
+"""
+Resolver - Priority-ordered field resolution in a single page.evaluate.
+
+The handlers' Python locator ladders cost one driver round trip (and often a
+caught exception) per candidate. RESOLVER_JS walks the same priorities in the
+browser: label[for] / wrapping label, then aria-label, then name/id. Handlers
+try it first and keep their ladders as the fallback.
+"""
+
+
+# Takes {type, label, value} and returns {status, ...}:
+#   'done'  - the action was performed in-page (native <select>)
+#   'found' - the element was tagged; act on `selector` from Python (file
+#             inputs need set_input_files)
+#   'none'  - nothing matched; fall back to the locator ladder
+RESOLVER_JS = """
+(action) => {
+    const norm = s => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    const needle = norm(action.label);
+    if (!needle) return { status: 'none' };
+    const compact = needle.replace(/[\\s_-]/g, '');
+    const visible = el => {
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0;
+    };
+
+    // Priority: label[for] / wrapping label, aria-label, name/id
+    const find = (selector, needVisible) => {
+        const ok = el => el.matches(selector) && (!needVisible || visible(el));
+        for (const lab of document.querySelectorAll('label')) {
+            if (!norm(lab.textContent).includes(needle)) continue;
+            const linked = lab.htmlFor ? document.getElementById(lab.htmlFor) : null;
+            if (linked && ok(linked)) return linked;
+            const inner = lab.querySelector(selector);
+            if (inner && ok(inner)) return inner;
+        }
+        for (const el of document.querySelectorAll(selector)) {
+            if (needVisible && !visible(el)) continue;
+            if (norm(el.getAttribute('aria-label')).includes(needle)) return el;
+            const key = ((el.name || '') + (el.id || '')).toLowerCase().replace(/[\\s_-]/g, '');
+            if (compact && key.includes(compact)) return el;
+        }
+        return null;
+    };
+
+    if (action.type === 'select') {
+        const select = find('select', true);
+        if (!select) return { status: 'none' };
+        const want = norm(String(action.value ?? ''));
+        const option = Array.from(select.options).find(o =>
+            norm(o.text) === want || o.value.toLowerCase() === want);
+        if (!option) return { status: 'none' };
+        select.scrollIntoView({ block: 'center' });
+        select.value = option.value;
+        select.dispatchEvent(new Event('input', { bubbles: true }));
+        select.dispatchEvent(new Event('change', { bubbles: true }));
+        return { status: 'done', detail: norm(option.text) };
+    }
+
+    if (action.type === 'upload') {
+        const input = find('input[type="file"]', false);
+        if (!input) return { status: 'none' };
+        window.__formResolverSeq = (window.__formResolverSeq || 0) + 1;
+        const token = String(window.__formResolverSeq);
+        input.setAttribute('data-form-resolver', token);
+        return { status: 'found', selector: `[data-form-resolver="${token}"]` };
+    }
+
+    return { status: 'none' };
+}
+"""
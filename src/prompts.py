@@ -3,19 +3,70 @@ GPT-4o System Prompts for Vision Agent.
 Centralized prompt templates for page analysis and action generation.
 """
 
+import json
+
 # Main system prompt that instructs GPT-4o how to behave as a UI automation expert
 SYSTEM_PROMPT = """You are an expert UI automation agent specialized in filling job applications.
-You analyze screenshots of web pages and determine the next action to take.
+You analyze screenshots of web pages and determine the next actions to take.
 You must output ONLY valid JSON - no markdown, no explanations outside the JSON structure.
-Be precise and methodical. Only perform ONE action at a time."""
+Be precise and methodical. Return every action the visible page needs, in order."""
+
+
+def _compact_history(actions: list) -> str:
+    """
+    Render action history entries as compact JSON for the prompt.
+    
+    Keeps only the type, a truncated target label/value and the outcome;
+    anything else (step numbers, long values, reasoning) is dropped.
+    
+    Args:
+        actions: Action history entries
+    
+    Returns:
+        JSON array string
+    """
+    compact = []
+    for action in actions:
+        entry = {"t": action.get('type'), "label": str(action.get('target', ''))[:40]}
+        if action.get('value'):
+            entry["v"] = str(action['value'])[:60]
+        entry["ok"] = action.get('success', True)
+        compact.append(entry)
+    return json.dumps(compact, separators=(",", ":"), ensure_ascii=False)
+
+
+# Static instructions of the analysis prompt. They travel in the system message
+# so every step shares the same prefix (provider-side prompt caching matches
+# on prefixes); the user message only carries user data and history.
+_ANALYSIS_INSTRUCTIONS = """
+Analyze this job application page screenshot and determine the next actions.
+
+TASK:
+1. Identify the current page state (e.g., "Personal Info Form", "Work Experience", "Review Page", "Success/Confirmation")
+2. Find every unfilled field visible in the screenshot, top to bottom, and the next required action
+3. Map each to the appropriate user data
+4. Return them as an ordered list of action commands
+
+RULES (one action per field):
+- List up to 10 actions in page order; a click, upload or scroll ends the list (the page may change)
+- Action by field: text=fill (exact value) | dropdown=select | radio question=radio (value = option text, e.g. "LinkedIn") | checkbox=check | resume file=upload_resume | cover letter "Attach"/"Upload"=upload_cover_letter (never fill)
+- Skip fields that already have a value; never repeat an action that succeeded
+- Form complete (or only Submit/Apply left): click Next/Continue/Submit
+- Success/confirmation shown: status "completed"; stuck in a loop or error: status "error"
+
+OUTPUT FORMAT (strict JSON on one line, no whitespace between tokens):
+{"status":"processing|completed|error","page_state":"description of current page","reasoning":"brief explanation of what you see and why you chose these actions","actions":[{"type":"fill|click|select|radio|check|upload_resume|upload_cover_letter|scroll_down|scroll_up|wait","target_label":"visible text label or button text","target_type":"input|button|select|checkbox|radio|file|link","value":"text to enter, option to select, or radio option text (e.g., 'LinkedIn')","confidence":0.9}]}
+"""
 
+ANALYSIS_SYSTEM_PROMPT = SYSTEM_PROMPT + "\n" + _ANALYSIS_INSTRUCTIONS
 
-def get_analysis_prompt(user_data: dict, action_history: list = None) -> str:
+
+def get_analysis_prompt(user_data_block: str, action_history: list = None) -> str:
     """
-    Generate the analysis prompt for GPT-4o.
+    Generate the per-step user message for ANALYSIS_SYSTEM_PROMPT.
     
     Args:
-        user_data: User's profile information
+        user_data_block: Condensed user data, formatted once per session
         action_history: List of previous actions taken (for context)
     
     Returns:
@@ -23,61 +74,41 @@ def get_analysis_prompt(user_data: dict, action_history: list = None) -> str:
     """
     history_context = ""
     if action_history:
-        recent_actions = action_history[-5:]  # Only last 5 actions for context
-        history_context = f"\nRecent Actions Taken: {recent_actions}"
+        # Only last 5 actions for context
+        history_context = f"\nRecent Actions Taken: {_compact_history(action_history[-5:])}"
     
-    return f"""
-Analyze this job application page screenshot and determine the next action.
+    return "".join(("USER DATA:\n", user_data_block, "\n", history_context, "\n"))
 
-USER DATA:
-{user_data}
-{history_context}
+
+# Static instructions of the Set-of-Mark prompt (same layout)
+_SOM_ANALYSIS_INSTRUCTIONS = """
+Analyze this job application page screenshot. Interactive elements are marked with RED NUMBERED BOXES.
 
 TASK:
-1. Identify the current page state (e.g., "Personal Info Form", "Work Experience", "Review Page", "Success/Confirmation")
-2. Find the NEXT unfilled field or required action
-3. Map it to the appropriate user data
-4. Return a structured action command
-
-RULES:
-- Only perform ONE action at a time
-- For text fields: provide the exact value to fill
-- For dropdowns: identify the option to select (use "select" action)
-- For radio button questions (e.g., "How did you hear about us?"): use "radio" action with value set to the option text (like "LinkedIn")
-- For checkboxes: specify check/uncheck
-- For resume file uploads: use "upload_resume" action
-- For cover letter file uploads: use "upload_cover_letter" action (NOT fill)
-- If the cover letter field says "Attach" or "Upload" it needs upload_cover_letter, not fill
-- If a field already has a value, skip it and move to the next required item
-- Avoid repeating an action that already succeeded; look for the next unfilled requirement
-- If the form looks complete, prioritize clicking Next/Continue/Submit over refilling fields
-- If you see "Submit" or "Apply" and all fields are filled: click it
-- If you see a success/confirmation message: set status to "completed"
-- If stuck in a loop or error state: set status to "error"
+1. Identify the current page state
+2. Find the numbered elements that need interaction, in page order
+3. Determine the action to perform on each element
 
-OUTPUT FORMAT (strict JSON):
-{{
-    "status": "processing" | "completed" | "error",
-    "page_state": "description of current page",
-    "reasoning": "brief explanation of what you see and why you chose this action",
-    "action": {{
-        "type": "fill" | "click" | "select" | "radio" | "check" | "upload_resume" | "upload_cover_letter" | "scroll_down" | "scroll_up" | "wait",
-        "target_label": "visible text label or button text",
-        "target_type": "input" | "button" | "select" | "checkbox" | "radio" | "file" | "link",
-        "value": "text to enter, option to select, or radio option text (e.g., 'LinkedIn')",
-        "confidence": 0.0 to 1.0
-    }}
-}}
+RULES (one numbered element per action):
+- List up to 10 actions in page order; a click, upload or scroll ends the list (the page may change)
+- Reference elements by their NUMBER ID (red boxes); give exact text to type
+- Radio question=radio (value = option text) | cover letter upload=upload_cover_letter | target not marked=scroll_down/scroll_up
+- Skip elements that already have a value; never repeat an action that worked; when complete, go to Next/Continue/Submit
+
+OUTPUT FORMAT (strict JSON on one line, no whitespace between tokens):
+{"status":"processing|completed|error","page_state":"description of current page","reasoning":"brief explanation including which numbered elements you're targeting","actions":[{"type":"fill|click|select|radio|check|upload_resume|upload_cover_letter|scroll_down|scroll_up|wait","element_id":5,"target_label":"what this element appears to be for","value":"text to enter, option to select, or radio option text","confidence":0.9}]}
 """
 
+SOM_ANALYSIS_SYSTEM_PROMPT = SYSTEM_PROMPT + "\n" + _SOM_ANALYSIS_INSTRUCTIONS
 
-def get_som_analysis_prompt(user_data: dict, action_history: list = None) -> str:
+
+def get_som_analysis_prompt(user_data_block: str, action_history: list = None) -> str:
     """
-    Generate the Set-of-Mark analysis prompt.
+    Generate the per-step user message for SOM_ANALYSIS_SYSTEM_PROMPT.
     Used when elements are marked with numbered overlays.
     
     Args:
-        user_data: User's profile information
+        user_data_block: Condensed user data, formatted once per session
         action_history: List of previous actions taken
     
     Returns:
@@ -85,45 +116,62 @@ def get_som_analysis_prompt(user_data: dict, action_history: list = None) -> str
     """
     history_context = ""
     if action_history:
-        recent_actions = action_history[-5:]
-        history_context = f"\nRecent Actions Taken: {recent_actions}"
+        # Only last 5 actions for context
+        history_context = f"\nRecent Actions Taken: {_compact_history(action_history[-5:])}"
     
-    return f"""
-Analyze this job application page screenshot. Interactive elements are marked with RED NUMBERED BOXES.
+    return "".join(("USER DATA:\n", user_data_block, "\n", history_context, "\n"))
 
-USER DATA:
-{user_data}
-{history_context}
 
-TASK:
-1. Identify the current page state
-2. Find the numbered element that needs interaction next
-3. Determine the action to perform on that element
-
-RULES:
-- Reference elements by their NUMBER ID (shown in red boxes)
-- Only interact with ONE numbered element at a time
-- If you need to type, specify the exact text
-- For radio button questions: use "radio" action with the option text as value
-- For cover letter file uploads: use "upload_cover_letter" action
-- For unmarked areas that need scrolling, use scroll action
-- Skip elements that already have a value/selection and move to the next required item
-- Avoid repeating an action that already worked; progress toward Next/Continue/Submit when the form appears complete
-
-OUTPUT FORMAT (strict JSON):
-{{
-    "status": "processing" | "completed" | "error",
-    "page_state": "description of current page",
-    "reasoning": "brief explanation including which numbered element you're targeting",
-    "action": {{
-        "type": "fill" | "click" | "select" | "radio" | "check" | "upload_resume" | "upload_cover_letter" | "scroll_down" | "scroll_up" | "wait",
-        "element_id": 5,
-        "target_label": "what this element appears to be for",
-        "value": "text to enter, option to select, or radio option text",
-        "confidence": 0.0 to 1.0
-    }}
-}}
-"""
+def get_turn_prompt(new_actions: list = None) -> str:
+    """
+    Generate the text sent with each step's screenshot in a conversation.
+    
+    Earlier turns stay in the conversation, so only the actions taken since
+    the previous screenshot are reported (a delta, not the full history).
+    
+    Args:
+        new_actions: Action history entries added since the last turn
+    
+    Returns:
+        Formatted prompt string
+    """
+    if not new_actions:
+        return "Current page screenshot."
+    return f"Actions since the last screenshot: {_compact_history(new_actions)}\nCurrent page screenshot."
+
+
+# Placeholder for the USER DATA block when the model fetches profile data
+# through tools; keeps the user message layout unchanged
+TOOLS_USER_DATA_NOTE = "Not included. Call the get_* tools for only the fields this page needs."
+
+
+def _user_data_tool(name: str, description: str, properties: dict = None) -> dict:
+    """Build an OpenAI function-tool schema for one user data section."""
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {"type": "object", "properties": properties or {}},
+        },
+    }
+
+
+# User profile sections the model can fetch on demand (see utils.lookup_user_data)
+USER_DATA_TOOLS = [
+    _user_data_tool("get_personal_info", "Name, email, phone, address and professional links (LinkedIn, GitHub, portfolio)."),
+    _user_data_tool("get_work_authorization", "Work authorization, sponsorship and relocation answers."),
+    _user_data_tool("get_preferences", "Salary expectation, notice period, start date, work type and how the user heard about the job."),
+    _user_data_tool("get_education", "Education history."),
+    _user_data_tool("get_work_experience", "Work experience history."),
+    _user_data_tool(
+        "get_skills",
+        "Skills, optionally limited to one category.",
+        {"category": {"type": "string", "description": "Skill category, e.g. programming_languages"}},
+    ),
+    _user_data_tool("get_prepared_answers", "Prepared answers to common application questions and the cover letter text."),
+    _user_data_tool("get_diversity_info", "Pronouns, gender, ethnicity, veteran and disability status."),
+]
 
 
 def get_answer_generation_prompt(question: str, user_data: dict, resume_text: str = None) -> str:
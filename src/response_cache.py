@@ -0,0 +1,113 @@
+"""
+Response Cache - On-disk cache of page analysis responses.
+Replaying an identical request (same prompts, screenshot and model) returns the
+stored response instead of paying for another API call. Cache failures never
+end a run: a failed read is a miss and a failed write is skipped.
+"""
+
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from ._console import console
+
+
+# Seconds a connection waits on another writer's lock before giving up
+BUSY_TIMEOUT_SECONDS = 5.0
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of raw model responses keyed by request content.
+
+    Usage:
+        cache = ResponseCache(Path("responses.sqlite"))
+        key = cache.make_key(model, system_prompt, user_prompt, image_b64)
+        text = cache.get(key)
+        if text is None:
+            text = call_api()
+            cache.put(key, text)
+    """
+
+    def __init__(self, path: Path, max_entries: Optional[int] = None):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file location; parent directories are created
+            max_entries: Keep at most this many entries, dropping the least
+                recently written (unbounded when None)
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._conn = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Concurrent agents open their own connections to the same file;
+            # WAL lets readers proceed while one of them writes
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        except (OSError, sqlite3.Error) as e:
+            console.print(f"[yellow]⚠ Cache disabled ({self.path.name}): {e}[/yellow]")
+
+    @staticmethod
+    def make_key(model: str, *parts: str) -> str:
+        """
+        Build a cache key from the model and every request part.
+
+        Args:
+            model: Model name (responses differ across models)
+            *parts: Prompt texts and the base64 screenshot, in request order
+
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.sha256(model.encode('utf-8'))
+        for part in parts:
+            # Length prefix keeps ("ab", "c") and ("a", "bc") apart
+            encoded = part.encode('utf-8')
+            digest.update(len(encoded).to_bytes(8, 'big'))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text, or None on a miss (or a read error)."""
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            console.print(f"[yellow]⚠ Cache read failed ({self.path.name}): {e}[/yellow]")
+            return None
+        return row[0] if row else None
+
+    def put(self, key: str, response: str):
+        """Store a response text under the key (skipped on a write error)."""
+        if self._conn is None:
+            return
+        try:
+            with self._conn:  # One transaction: committed, or rolled back on error
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)", (key, response)
+                )
+                if self.max_entries:
+                    # REPLACE assigns a new rowid, so rowid order is write order
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE rowid IN "
+                        "(SELECT rowid FROM responses ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,)
+                    )
+        except sqlite3.Error as e:
+            console.print(f"[yellow]⚠ Cache write skipped ({self.path.name}): {e}[/yellow]")
+
+    def close(self):
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
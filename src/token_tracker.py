@@ -3,36 +3,44 @@ Token Tracker - Track token usage and costs per job application.
 Provides detailed breakdown and cost estimation for GPT-4o-mini usage.
 """
 
+import time
 from dataclasses import dataclass, field
-from typing import List, Optional
-from datetime import datetime
-from rich.console import Console
-from rich.table import Table
+from typing import List, NamedTuple, Optional
 
-console = Console()
+from ._console import console
+
+
+class Pricing(NamedTuple):
+    """Per-token USD prices for one model."""
+    input: float
+    cached_input: float  # Prompt-cache hits
+    output: float
 
 
 # GPT-4o-mini pricing (as of Jan 2025)
 PRICING = {
-    "gpt-4o-mini": {
-        "input": 0.15 / 1_000_000,   # $0.15 per 1M input tokens
-        "output": 0.60 / 1_000_000,  # $0.60 per 1M output tokens
-    },
-    "gpt-4o": {
-        "input": 2.50 / 1_000_000,   # $2.50 per 1M input tokens
-        "output": 10.00 / 1_000_000, # $10.00 per 1M output tokens
-    }
+    "gpt-4o-mini": Pricing(
+        input=0.15 / 1_000_000,          # $0.15 per 1M input tokens
+        cached_input=0.075 / 1_000_000,  # $0.075 per 1M prompt-cache hits
+        output=0.60 / 1_000_000,         # $0.60 per 1M output tokens
+    ),
+    "gpt-4o": Pricing(
+        input=2.50 / 1_000_000,          # $2.50 per 1M input tokens
+        cached_input=1.25 / 1_000_000,   # $1.25 per 1M prompt-cache hits
+        output=10.00 / 1_000_000,        # $10.00 per 1M output tokens
+    ),
 }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class StepUsage:
-    """Token usage for a single automation step."""
+    """Token usage for a single automation step (slotted: no per-instance __dict__)."""
     step: int
     input_tokens: int
     output_tokens: int
     action_type: str
-    timestamp: datetime = field(default_factory=datetime.now)
+    cached_input_tokens: int = 0  # Part of input_tokens served from the prompt cache
+    timestamp: float = field(default_factory=time.time)  # Epoch seconds
 
 
 class TokenTracker:
@@ -57,10 +65,16 @@ class TokenTracker:
             model: The OpenAI model being used (for pricing)
         """
         self.model = model
+        self._pricing = PRICING.get(model, PRICING["gpt-4o-mini"])
         self.step_usage: List[StepUsage] = []
         self.total_input_tokens = 0
         self.total_output_tokens = 0
-        self.start_time = datetime.now()
+        self.total_cached_input_tokens = 0
+        # Running costs, updated in record() so get_summary() only reads them
+        self._input_cost = 0.0
+        self._output_cost = 0.0
+        self.cache_hits = 0
+        self._start = time.monotonic()
     
     def record(self, response, step: int = None, action_type: str = "unknown") -> dict:
         """
@@ -77,10 +91,19 @@ class TokenTracker:
         usage = response.usage
         input_tokens = usage.prompt_tokens
         output_tokens = usage.completion_tokens
+        # Prompt-cache hits are billed at the cached rate (absent on older SDKs)
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_tokens = getattr(details, 'cached_tokens', None) or 0
         
         # Update totals
         self.total_input_tokens += input_tokens
         self.total_output_tokens += output_tokens
+        self.total_cached_input_tokens += cached_tokens
+        self._input_cost += (
+            (input_tokens - cached_tokens) * self._pricing.input
+            + cached_tokens * self._pricing.cached_input
+        )
+        self._output_cost += output_tokens * self._pricing.output
         
         # Record step usage
         step_num = step if step is not None else len(self.step_usage) + 1
@@ -88,7 +111,30 @@ class TokenTracker:
             step=step_num,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
-            action_type=action_type
+            action_type=action_type,
+            cached_input_tokens=cached_tokens
+        ))
+        
+        return self.get_summary()
+    
+    def record_cached(self, step: int = None, action_type: str = "unknown") -> dict:
+        """
+        Record a step answered from the response cache (no tokens billed).
+        
+        Args:
+            step: Current automation step number
+            action_type: Type of action being performed
+            
+        Returns:
+            Current usage summary dict
+        """
+        self.cache_hits += 1
+        step_num = step if step is not None else len(self.step_usage) + 1
+        self.step_usage.append(StepUsage(
+            step=step_num,
+            input_tokens=0,
+            output_tokens=0,
+            action_type=f"{action_type} (cached)"
         ))
         
         return self.get_summary()
@@ -100,31 +146,30 @@ class TokenTracker:
         Returns:
             Dictionary with usage statistics and cost estimation
         """
-        pricing = PRICING.get(self.model, PRICING["gpt-4o-mini"])
-        input_cost = self.total_input_tokens * pricing["input"]
-        output_cost = self.total_output_tokens * pricing["output"]
-        total_cost = input_cost + output_cost
+        total_tokens = self.total_input_tokens + self.total_output_tokens
+        steps = len(self.step_usage)
         
         return {
             "model": self.model,
             "input_tokens": self.total_input_tokens,
+            "cached_input_tokens": self.total_cached_input_tokens,
             "output_tokens": self.total_output_tokens,
-            "total_tokens": self.total_input_tokens + self.total_output_tokens,
-            "input_cost_usd": round(input_cost, 6),
-            "output_cost_usd": round(output_cost, 6),
-            "estimated_cost_usd": round(total_cost, 6),
-            "steps": len(self.step_usage),
-            "avg_tokens_per_step": (
-                (self.total_input_tokens + self.total_output_tokens) // len(self.step_usage)
-                if self.step_usage else 0
-            ),
-            "duration_seconds": (datetime.now() - self.start_time).total_seconds()
+            "total_tokens": total_tokens,
+            "input_cost_usd": round(self._input_cost, 6),
+            "output_cost_usd": round(self._output_cost, 6),
+            "estimated_cost_usd": round(self._input_cost + self._output_cost, 6),
+            "steps": steps,
+            "cache_hits": self.cache_hits,
+            "avg_tokens_per_step": total_tokens // steps if steps else 0,
+            "duration_seconds": time.monotonic() - self._start
         }
     
     def print_summary(self):
         """Print a formatted summary table to console."""
         summary = self.get_summary()
         
+        from rich.table import Table
+        
         console.print("\n")
         table = Table(title="📊 Token Usage Summary", border_style="cyan")
         table.add_column("Metric", style="bold cyan")
@@ -132,7 +177,11 @@ class TokenTracker:
         
         table.add_row("Model", summary["model"])
         table.add_row("Total Steps", str(summary["steps"]))
+        if summary["cache_hits"]:
+            table.add_row("Cached Responses", str(summary["cache_hits"]))
         table.add_row("Input Tokens", f"{summary['input_tokens']:,}")
+        if summary["cached_input_tokens"]:
+            table.add_row("  of which cached", f"{summary['cached_input_tokens']:,}")
         table.add_row("Output Tokens", f"{summary['output_tokens']:,}")
         table.add_row("Total Tokens", f"{summary['total_tokens']:,}")
         table.add_row("Avg Tokens/Step", f"{summary['avg_tokens_per_step']:,}")
@@ -150,6 +199,8 @@ class TokenTracker:
             console.print("[dim]No steps recorded yet[/dim]")
             return
         
+        from rich.table import Table
+        
         table = Table(title="Step-by-Step Breakdown", border_style="blue")
         table.add_column("Step", style="cyan", justify="right")
         table.add_column("Action", style="white")
@@ -174,4 +225,8 @@ class TokenTracker:
         self.step_usage = []
         self.total_input_tokens = 0
         self.total_output_tokens = 0
-        self.start_time = datetime.now()
+        self.total_cached_input_tokens = 0
+        self._input_cost = 0.0
+        self._output_cost = 0.0
+        self.cache_hits = 0
+        self._start = time.monotonic()
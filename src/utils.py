@@ -3,17 +3,30 @@ Utility functions for Vision Agent.
 Includes logging, file management, and validation helpers.
 """
 
+import hashlib
+import heapq
 import json
 import os
 import re
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
 
-console = Console()
+from ._console import console
+
+try:
+    # C-accelerated parser; orjson.JSONDecodeError subclasses json.JSONDecodeError
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps_compact(data) -> str:
+        return orjson.dumps(data).decode()
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps_compact(data) -> str:
+        # Same output as orjson: no whitespace, UTF-8 text left unescaped
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
 
 
 def setup_logging(verbose: bool = False):
@@ -38,6 +51,16 @@ def ensure_directories(*paths: Path):
         path.mkdir(parents=True, exist_ok=True)
 
 
+# Required personal_info keys checked by validate_user_data
+_REQUIRED_PERSONAL_FIELDS = (
+    ('first_name', 'First name'),
+    ('last_name', 'Last name'),
+    ('email', 'Email'),
+)
+_MISSING = object()
+_EMAIL_RE = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+
+
 def validate_user_data(data: dict) -> tuple[bool, list]:
     """
     Validate that user.json has required fields.
@@ -49,26 +72,20 @@ def validate_user_data(data: dict) -> tuple[bool, list]:
         Tuple of (is_valid, list of error messages)
     """
     errors = []
-    required_fields = [
-        ('personal_info.first_name', 'First name'),
-        ('personal_info.last_name', 'Last name'),
-        ('personal_info.email', 'Email'),
-    ]
-    
-    for field_path, display_name in required_fields:
-        parts = field_path.split('.')
-        current = data
-        try:
-            for part in parts:
-                current = current[part]
-            if not current:
-                errors.append(f"{display_name} is empty")
-        except (KeyError, TypeError):
+    personal = data.get('personal_info')
+    if not isinstance(personal, dict):
+        personal = {}
+    
+    for key, display_name in _REQUIRED_PERSONAL_FIELDS:
+        value = personal.get(key, _MISSING)
+        if value is _MISSING:
             errors.append(f"{display_name} is missing")
+        elif not value:
+            errors.append(f"{display_name} is empty")
     
     # Validate email format
-    email = data.get('personal_info', {}).get('email', '')
-    if email and not re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', email):
+    email = personal.get('email', '')
+    if email and not _EMAIL_RE.match(email):
         errors.append("Email format is invalid")
     
     return len(errors) == 0, errors
@@ -89,8 +106,7 @@ def load_user_data(path: Path) -> Optional[dict]:
         return None
     
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = _json_loads(path.read_bytes())
         
         is_valid, errors = validate_user_data(data)
         if not is_valid:
@@ -115,20 +131,24 @@ def cleanup_screenshots(directory: Path, keep_last: int = 5):
         directory: Screenshots directory
         keep_last: Number of recent screenshots to keep
     """
-    if not directory.exists():
+    # One directory read; DirEntry.stat() reuses the scan's data where the OS provides it
+    try:
+        with os.scandir(directory) as it:
+            screenshots = [(entry.stat().st_mtime, entry.path) for entry in it
+                           if entry.name.endswith(('.jpg', '.webp')) and entry.is_file()]
+    except OSError:
         return
     
-    screenshots = sorted(
-        directory.glob('*.jpg'),
-        key=lambda f: f.stat().st_mtime,
-        reverse=True
-    )
+    if len(screenshots) <= keep_last:
+        return
     
-    for screenshot in screenshots[keep_last:]:
-        try:
-            screenshot.unlink()
-        except Exception:
-            pass
+    keep = {path for _, path in heapq.nlargest(keep_last, screenshots)}
+    for _, path in screenshots:
+        if path not in keep:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
 
 
 def get_timestamp() -> str:
@@ -143,6 +163,8 @@ def print_action_summary(action: dict):
     Args:
         action: The action dictionary from GPT-4o response
     """
+    from rich.table import Table
+    
     table = Table(title="AI Decision", show_header=False, border_style="blue")
     table.add_column("Key", style="cyan")
     table.add_column("Value", style="white")
@@ -172,17 +194,21 @@ def print_status_panel(status: str, page_state: str, reasoning: str):
         'error': 'red'
     }.get(status, 'white')
     
+    from rich.panel import Panel
+    
     content = f"[bold]Page State:[/bold] {page_state}\n\n[bold]Reasoning:[/bold] {reasoning}"
     console.print(Panel(content, title=f"Status: {status.upper()}", border_style=color))
 
 
-def format_user_data_for_prompt(user_data: dict) -> str:
+def format_user_data_for_prompt(user_data: dict, include_answers: bool = True) -> str:
     """
     Format user data as a concise string for GPT-4o prompts.
     Reduces token usage by only including essential fields.
     
     Args:
         user_data: Full user data dictionary
+        include_answers: Include prepared answers and the cover letter; turn
+            off when they are sent separately via build_answers_pack
         
     Returns:
         Condensed string representation
@@ -225,15 +251,13 @@ def format_user_data_for_prompt(user_data: dict) -> str:
     
     # Add skills summary
     skills = user_data.get('skills', {})
-    all_skills = []
-    for skill_list in skills.values():
-        if isinstance(skill_list, list):
-            all_skills.extend(skill_list[:3])  # Max 3 from each category
-    condensed['key_skills'] = ', '.join(all_skills[:10])  # Max 10 total
+    skill_lists = [skill_list for skill_list in skills.values() if isinstance(skill_list, list)]
+    all_skills = [skill for skill_list in skill_lists for skill in skill_list[:3]]  # Max 3 from each category
+    condensed['key_skills'] = ', '.join(map(str, all_skills[:10]))  # Max 10 total
     
     # Add common question answers
     common_q = user_data.get('common_questions', {})
-    if common_q:
+    if common_q and include_answers:
         condensed['prepared_answers'] = common_q
     
     # Add diversity/demographic info
@@ -246,10 +270,112 @@ def format_user_data_for_prompt(user_data: dict) -> str:
         condensed['disability_status'] = diversity.get('disability_status', '')
     
     # Add cover letter if present
-    if user_data.get('cover_letter'):
+    if user_data.get('cover_letter') and include_answers:
         condensed['cover_letter'] = user_data['cover_letter']
     
-    return json.dumps(condensed, indent=2)
+    # Compact: indentation only adds billed tokens
+    return _json_dumps_compact(condensed)
+
+
+def build_answers_pack(user_data: dict) -> str:
+    """
+    Build the static prepared-answers block (common questions and cover letter).
+    
+    The output is deterministic (sorted keys) and tagged with an md5 version, so
+    it can sit in the system message and stay part of the cached prompt prefix
+    instead of being re-sent inside the per-step user data.
+    
+    Args:
+        user_data: Full user data dictionary
+        
+    Returns:
+        Answers block, or an empty string when there is nothing to include
+    """
+    pack = {}
+    if user_data.get('common_questions'):
+        pack['prepared_answers'] = user_data['common_questions']
+    if user_data.get('cover_letter'):
+        pack['cover_letter'] = user_data['cover_letter']
+    if not pack:
+        return ""
+    
+    body = json.dumps(pack, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    version = hashlib.md5(body.encode('utf-8')).hexdigest()[:8]
+    return f"PREPARED ANSWERS (v{version}):\n{body}"
+
+
+# Tool name -> user data keys it returns (schemas in prompts.USER_DATA_TOOLS)
+_USER_DATA_SECTIONS = {
+    'get_personal_info': ('personal_info', 'professional_links'),
+    'get_work_authorization': ('work_authorization',),
+    'get_preferences': ('preferences',),
+    'get_education': ('education',),
+    'get_work_experience': ('work_experience',),
+    'get_skills': ('skills',),
+    'get_prepared_answers': ('common_questions', 'cover_letter'),
+    'get_diversity_info': ('diversity_info',),
+}
+
+
+def lookup_user_data(user_data: dict, name: str, arguments: Optional[dict] = None) -> str:
+    """
+    Answer a user data tool call with the matching profile section.
+    
+    Args:
+        user_data: Full user data dictionary
+        name: Tool name requested by the model
+        arguments: Parsed tool arguments (only get_skills takes one)
+        
+    Returns:
+        Compact JSON for the requested section
+    """
+    keys = _USER_DATA_SECTIONS.get(name)
+    if keys is None:
+        return _json_dumps_compact({'error': f"Unknown tool: {name}"})
+    
+    section = {key: user_data[key] for key in keys if key in user_data}
+    category = (arguments or {}).get('category')
+    if name == 'get_skills' and category:
+        skills = section.get('skills', {})
+        section = {'skills': {category: skills[category]} if category in skills else skills}
+    return _json_dumps_compact(section)
+
+
+def _object_spans(text: str) -> list[tuple[int, int]]:
+    """
+    Find every balanced {...} span in one pass over the text.
+    
+    Opening braces are kept on a stack, so a brace that never closes does not
+    hide the objects after it. Braces inside string literals (including
+    escaped quotes) are ignored.
+    
+    Args:
+        text: Text to scan
+        
+    Returns:
+        (start, end) index pairs of each balanced span, ordered by start so
+        an enclosing object comes before the objects nested in it
+    """
+    spans = []
+    starts = []
+    in_string = False
+    escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            starts.append(i)
+        elif char == '}' and starts:
+            spans.append((starts.pop(), i))
+    spans.sort()
+    return spans
 
 
 def extract_json_from_response(text: str) -> Optional[dict]:
@@ -264,23 +390,27 @@ def extract_json_from_response(text: str) -> Optional[dict]:
     """
     # Try direct parse first
     try:
-        return json.loads(text)
+        return _json_loads(text)
     except json.JSONDecodeError:
         pass
     
-    # Try to find JSON block
-    patterns = [
-        r'```json\s*(.*?)\s*```',  # Markdown code block
-        r'```\s*(.*?)\s*```',       # Plain code block
-        r'\{.*\}',                   # Raw JSON object
-    ]
+    # Balanced {...} spans, all found in a single scan; the earliest that
+    # parses wins, so an unclosed brace in leading prose is skipped over
+    for start, end in _object_spans(text):
+        try:
+            return _json_loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            continue
     
-    for pattern in patterns:
-        match = re.search(pattern, text, re.DOTALL)
-        if match:
+    # Markdown code block holding something other than a bare object
+    fence = text.find('```')
+    if fence != -1:
+        body_start = text.find('\n', fence)
+        body_end = text.find('```', fence + 3)
+        if body_start != -1 and body_end > body_start:
             try:
-                return json.loads(match.group(1) if '```' in pattern else match.group(0))
+                return _json_loads(text[body_start:body_end].strip())
             except json.JSONDecodeError:
-                continue
+                pass
     
     return None
@@ -5,51 +5,160 @@ Implements the Look-Think-Act loop for intelligent form filling.
 """
 
 import base64
+import contextlib
+import hashlib
+import io
 import json
+import random
+import re
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
+import httpx
 from PIL import Image
+import openai
 from openai import OpenAI
 from playwright.sync_api import sync_playwright, Page, Browser
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from .element_marker import ElementMarker
-from .prompts import SYSTEM_PROMPT, get_analysis_prompt, get_som_analysis_prompt, get_answer_generation_prompt
+from .prompts import (
+    ANALYSIS_SYSTEM_PROMPT,
+    SOM_ANALYSIS_SYSTEM_PROMPT,
+    get_analysis_prompt,
+    get_som_analysis_prompt,
+    get_turn_prompt,
+    get_answer_generation_prompt,
+    TOOLS_USER_DATA_NOTE,
+    USER_DATA_TOOLS,
+)
 from .utils import (
+    build_answers_pack,
     format_user_data_for_prompt,
     print_action_summary,
     print_status_panel,
     extract_json_from_response,
     get_timestamp,
+    lookup_user_data,
     cleanup_screenshots
 )
 from .token_tracker import TokenTracker
-from .form_handlers import FormController
+from .response_cache import ResponseCache
+from .form_handlers import (
+    FormController,
+    first_visible,
+    is_page_changing,
+)
+from ._console import console, get_console
+
+try:
+    # SIMD-accelerated base64 with the same output as the stdlib
+    import pybase64
+    _b64encode = pybase64.b64encode
+except ImportError:
+    _b64encode = base64.b64encode
+
+
+# Screenshot encodings sent to the model: (PIL format, file extension, save options).
+# WebP is several times smaller than JPEG at similar legibility; JPEG is the fallback.
+SCREENSHOT_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 70, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 85}),
+}
+
+# Summarizes the rendered form state: location, each control with whether it
+# holds a value, custom dropdown text and button labels. Values themselves are
+# left out so the fingerprint is stable across sessions.
+_PAGE_FINGERPRINT_JS = """
+() => {
+    const rendered = el => {
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0;
+    };
+    const parts = [location.host + location.pathname];
+    for (const el of document.querySelectorAll('input:not([type="hidden"]), textarea, select')) {
+        if (!rendered(el)) continue;
+        const filled = (el.type === 'checkbox' || el.type === 'radio') ? el.checked : !!el.value;
+        const name = el.name || el.id || el.getAttribute('aria-label') || '';
+        parts.push([el.tagName, el.type || '', name, filled ? 1 : 0].join(':'));
+    }
+    for (const el of document.querySelectorAll('[role="combobox"], button, [role="button"]')) {
+        if (rendered(el)) parts.push(el.tagName + '>' + (el.textContent || '').trim().slice(0, 40));
+    }
+    return parts.join('|');
+}
+"""
+
+# Page states remembered by the action cache before the oldest are dropped
+ACTION_CACHE_MAX_ENTRIES = 5000
 
-console = Console()
+# Screenshots up to this width are sent at "low" detail in auto mode (a flat,
+# small token cost); wider ones need "high" to keep form labels legible
+LOW_DETAIL_MAX_WIDTH = 768
 
+# Output budget of one analysis: the compact JSON of a full 10-action list
+# fits well within it, and fewer generated tokens means faster replies
+ANALYSIS_MAX_TOKENS = 600
 
-def scroll_element_into_view(page: Page, locator) -> bool:
+# Idle OpenAI connections are kept this long, so steps spaced by page waits
+# reuse the open TLS connection instead of handshaking again
+HTTP_KEEPALIVE_SECONDS = 60
+
+
+def make_http_client() -> httpx.Client:
     """
-    Scroll an element into view before interacting with it.
+    Build the keep-alive HTTP client for OpenAI requests.
+    
+    HTTP/2 is used when the optional h2 package is installed, letting
+    concurrent agents multiplex requests over one connection.
     
-    Args:
-        page: Playwright page object
-        locator: Playwright locator for the element
-        
     Returns:
-        True if element is now visible
+        httpx.Client to pass as OpenAI(http_client=...); thread-safe, so one
+        client can be shared by several agents
     """
     try:
-        if locator.count() > 0:
-            locator.first.scroll_into_view_if_needed()
-            time.sleep(0.3)  # Brief wait after scroll
-            return True
-    except Exception:
-        pass
-    return False
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    return httpx.Client(
+        http2=http2,
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(max_keepalive_connections=16, keepalive_expiry=HTTP_KEEPALIVE_SECONDS),
+    )
+
+
+# OpenAI errors worth retrying: rate limits, timeouts, dropped connections
+# and server-side failures
+RETRYABLE_API_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+# Attempts per OpenAI request and the cap on the backoff between them
+MAX_API_ATTEMPTS = 3
+MAX_API_BACKOFF_SECONDS = 30.0
+
+# Tool-call rounds allowed per analysis before a final answer is forced
+MAX_TOOL_ROUNDS = 3
+
+# Previous analysis turns kept in the conversation sent with each step
+MAX_CONVERSATION_TURNS = 5
+
+
+# Screenshots pass their own timeout: the handlers lower the page-wide default
+# to 5 s, which a full capture of a heavy page can exceed
+SCREENSHOT_TIMEOUT_MS = 30000
+
+# Screenshots of single runs; concurrent jobs each get a subfolder
+DEFAULT_SCREENSHOTS_DIR = Path(__file__).parent.parent / "screenshots"
+
+# First form control on a freshly loaded application page
+_FORM_CONTROL_SELECTOR = 'input:not([type="hidden"]), textarea, select, button'
 
 
 class VisionAgent:
@@ -72,8 +181,20 @@ class VisionAgent:
         max_steps: int = 30,
         action_delay: float = 2.0,
         screenshot_width: int = 1024,
+        screenshot_format: str = "webp",
+        image_detail: str = "auto",
         enable_som: bool = False,
-        cover_letter_path: str | Path = None
+        cover_letter_path: str | Path = None,
+        use_tools: bool = False,
+        response_cache_path: str | Path = None,
+        action_cache_path: str | Path = None,
+        save_screenshots: bool = False,
+        screenshots_dir: str | Path = None,
+        keep_screenshots: Optional[int] = 10,
+        verbose: bool = True,
+        request_slots: Optional[threading.Semaphore] = None,
+        show_progress: bool = True,
+        http_client: Optional[httpx.Client] = None
     ):
         """
         Initialize the Vision Agent.
@@ -84,10 +205,33 @@ class VisionAgent:
             api_key: OpenAI API key
             headless: Run browser without visible window
             max_steps: Maximum automation steps (safety limit)
-            action_delay: Seconds to wait between actions
+            action_delay: Maximum seconds to wait for the page to settle between steps
             screenshot_width: Width to resize screenshots (reduces token cost)
+            screenshot_format: Screenshot encoding sent to the model ("webp" or "jpeg")
+            image_detail: Vision detail level ("low", "high", or "auto" to use
+                "low" for screenshots at most LOW_DETAIL_MAX_WIDTH wide)
             enable_som: Enable Set-of-Mark for precise element targeting
             cover_letter_path: Path to cover letter text file
+            use_tools: Let the model fetch user data sections through tool
+                calls instead of sending the whole profile every step
+            response_cache_path: SQLite file for caching analysis responses
+                (disabled when None)
+            action_cache_path: SQLite file remembering the actions that succeeded
+                on each page state, reused without a GPT call (disabled when None)
+            save_screenshots: Write every step's screenshot to disk (debugging);
+                otherwise only the final confirmation is saved
+            screenshots_dir: Where screenshots are written (default: the
+                project's screenshots folder)
+            keep_screenshots: Screenshots kept when a run ends; None skips the
+                cleanup (run_agents cleans up after all jobs finish)
+            verbose: Log every successful form action; when False each batch
+                of field actions is reported with one summary line
+            request_slots: Semaphore shared by concurrent agents to cap
+                in-flight OpenAI requests (see run_agents)
+            show_progress: Show the analysis spinner (off for concurrent runs;
+                always off when headless or not writing to a terminal)
+            http_client: HTTP client shared with other agents (see run_agents);
+                by default the agent opens its own and releases it in close()
         """
         self.user_data_path = Path(user_data_path)
         self.resume_path = Path(resume_path)
@@ -98,7 +242,23 @@ class VisionAgent:
         self.max_steps = max_steps
         self.action_delay = action_delay
         self.screenshot_width = screenshot_width
+        if screenshot_format not in SCREENSHOT_FORMATS:
+            raise ValueError(f"Unsupported screenshot format: {screenshot_format}")
+        self.screenshot_format = screenshot_format
+        if image_detail == "auto":
+            image_detail = "low" if screenshot_width <= LOW_DETAIL_MAX_WIDTH else "high"
+        self.image_detail = image_detail
         self.enable_som = enable_som
+        self.use_tools = use_tools
+        self.save_screenshots = save_screenshots
+        self.verbose = verbose
+        self.request_slots = request_slots
+        # Headless and piped runs are unattended: skip the live renderer thread
+        self.show_progress = show_progress and not headless and sys.stdout.isatty()
+        
+        # Digest of the last raw capture with its encoded bytes and data URL,
+        # so an unchanged page is not resized and re-encoded
+        self._last_screenshot = None
         
         # Load user data
         self._load_user_data()
@@ -106,35 +266,55 @@ class VisionAgent:
         # Load cover letter if provided
         self._load_cover_letter()
         
-        # Initialize OpenAI client
-        self.client = OpenAI(api_key=api_key)
+        # Condensed version for prompts (reduces tokens), built once for the
+        # whole session now that user data is final. Prepared answers and the
+        # cover letter go into the system message as a static, cacheable block.
+        self.user_data_prompt = format_user_data_for_prompt(self.user_data, include_answers=False)
+        self.answers_pack = build_answers_pack(self.user_data)
+        
+        # Initialize OpenAI client over a keep-alive connection pool
+        self._owns_http_client = http_client is None
+        self._http_client = http_client or make_http_client()
+        # Retries are handled (and logged) by _create_completion
+        self.client = OpenAI(api_key=api_key, http_client=self._http_client, max_retries=0)
         
         # Initialize token tracker for cost monitoring
         self.token_tracker = TokenTracker(model="gpt-4o-mini")
         
+        # Optional on-disk cache of analysis responses (replays cost no tokens)
+        self.response_cache = ResponseCache(response_cache_path) if response_cache_path else None
+        
+        # Optional on-disk cache of successful actions per page state, shared
+        # across sessions (similar portals repeat the same pages)
+        self.action_cache = ResponseCache(action_cache_path, max_entries=ACTION_CACHE_MAX_ENTRIES) if action_cache_path else None
+        self._pending_page_entry = None
+        self._served_page_keys = set()
+        
         # Form controller (initialized when page is available)
         self.form_controller = None
         
         # Track action history to detect loops
         self.action_history = []
         
+        # Previous analysis turns sent back as chat history (text only)
+        self.conversation = []
+        self._last_turn_step = 0
+        
         # Screenshot directory
-        self.screenshots_dir = Path(__file__).parent.parent / "screenshots"
-        self.screenshots_dir.mkdir(exist_ok=True)
+        self.screenshots_dir = Path(screenshots_dir) if screenshots_dir else DEFAULT_SCREENSHOTS_DIR
+        self.screenshots_dir.mkdir(parents=True, exist_ok=True)
+        self.keep_screenshots = keep_screenshots
         
         console.print("[green]✓ Vision Agent initialized[/green]")
     
     def _load_user_data(self):
-        """Load and format user data for prompts."""
+        """Load user data (formatted for prompts once loading is complete)."""
         if not self.user_data_path.exists():
             raise FileNotFoundError(f"User data not found: {self.user_data_path}")
         
         with open(self.user_data_path, 'r', encoding='utf-8') as f:
             self.user_data = json.load(f)
         
-        # Create condensed version for prompts (reduces tokens)
-        self.user_data_prompt = format_user_data_for_prompt(self.user_data)
-        
         console.print(f"[green]✓ Loaded user data from {self.user_data_path.name}[/green]")
     
     def _load_cover_letter(self):
@@ -145,8 +325,6 @@ class VisionAgent:
             
             # Add cover letter to user data for prompts
             self.user_data['cover_letter'] = self.cover_letter_text
-            # Update the prompt version too
-            self.user_data_prompt = format_user_data_for_prompt(self.user_data)
             
             console.print(f"[green]✓ Loaded cover letter from {self.cover_letter_path.name}[/green]")
         elif self.cover_letter_path:
@@ -165,11 +343,13 @@ class VisionAgent:
                 page.get_by_text(label, exact=False)
             ]
             for locator in locators:
+                button = first_visible(locator)
+                if button is None:
+                    continue
                 try:
-                    if locator.count() > 0 and locator.first.is_visible():
-                        locator.first.click(force=True)
-                        time.sleep(0.2)
-                        break
+                    button.click(force=True)
+                    time.sleep(0.2)
+                    break
                 except Exception:
                     continue
     
@@ -216,25 +396,30 @@ class VisionAgent:
         if self.cover_letter_text:
             add_fill(["Cover Letter", "Cover letter text"], self.cover_letter_text)
         
+        # Every label variant goes to the page in one evaluate; fields missing
+        # from this page are simply skipped rather than searched for one by one
+        results = self.form_controller.execute_batch([
+            {
+                'type': 'fill',
+                'target_label': labels[0],
+                'alt_labels': labels[1:],
+                'target_type': 'input',
+                'value': value,
+                'confidence': 0.95
+            }
+            for labels, value in actions
+        ], fallback=False)
+        
         filled = 0
-        for labels, value in actions:
-            for label in labels:
-                action = {
-                    'type': 'fill',
-                    'target_label': label,
-                    'target_type': 'input',
-                    'value': value,
-                    'confidence': 0.95
-                }
-                if self.form_controller.execute(action):
-                    filled += 1
-                    self.action_history.append({
-                        'step': 0,
-                        'type': 'prefill',
-                        'target': label,
-                        'success': True
-                    })
-                    break
+        for (labels, value), ok in zip(actions, results):
+            if ok:
+                filled += 1
+                self.action_history.append({
+                    'step': 0,
+                    'type': 'prefill',
+                    'target': labels[0],
+                    'success': True
+                })
         if filled:
             console.print(f"[dim]Prefilled {filled} common fields without GPT[/dim]")
         return filled
@@ -258,120 +443,305 @@ class VisionAgent:
             console.print(f"[dim]Quick upload attempt skipped: {e}[/dim]")
         return uploads
     
-    def _capture_screenshot(self, page: Page, filename: str = None) -> str:
+    def _capture_screenshot(self, page: Page, filename: str = None, save: bool = None) -> str:
         """
-        Capture and optimize a screenshot of the current page.
+        Capture and optimize a screenshot of the current page, in memory.
         
         Args:
             page: Playwright page object
-            filename: Optional custom filename
+            filename: Optional custom file stem when saving (extension follows
+                the screenshot format)
+            save: Also write the image to the screenshots directory
+                (defaults to the agent's save_screenshots setting)
             
         Returns:
-            Path to the saved screenshot
+            data: URL of the image in screenshot_format, ready for the analysis request
         """
-        if filename is None:
-            filename = f"step_{len(self.action_history) + 1}_{get_timestamp()}.jpg"
-        
-        screenshot_path = self.screenshots_dir / filename
-        
-        # Capture full page screenshot
-        page.screenshot(path=str(screenshot_path), type="jpeg", quality=85)
+        # Lossless capture to bytes (Playwright cannot emit WebP); encoded once below
+        raw_bytes = page.screenshot(type="png", timeout=SCREENSHOT_TIMEOUT_MS)
+        digest = hashlib.blake2b(raw_bytes, digest_size=16).digest()
+        if self._last_screenshot and self._last_screenshot[0] == digest:
+            # Pixel-identical to the previous step: reuse its encoding
+            _, image_bytes, image_url = self._last_screenshot
+            console.print("[dim]Screenshot unchanged since the last step[/dim]")
+        else:
+            image_bytes = self._encode_screenshot(raw_bytes)
+            # Built in one buffer: no separate base64 string to copy into the URL
+            buffer = bytearray(f"data:image/{self.screenshot_format};base64,".encode('ascii'))
+            buffer += _b64encode(image_bytes)
+            image_url = buffer.decode('ascii')
+            self._last_screenshot = (digest, image_bytes, image_url)
+            console.print(
+                f"[dim]Screenshot: {len(raw_bytes) // 1024} KB PNG → "
+                f"{len(image_bytes) // 1024} KB {self.screenshot_format.upper()}[/dim]"
+            )
         
-        # Resize to reduce token cost
-        self._resize_image(screenshot_path)
+        if self.save_screenshots if save is None else save:
+            if filename is None:
+                filename = f"step_{len(self.action_history) + 1}_{get_timestamp()}"
+            screenshot_path = self.screenshots_dir / f"{filename}.{SCREENSHOT_FORMATS[self.screenshot_format][1]}"
+            screenshot_path.write_bytes(image_bytes)
+            console.print(f"[dim]Screenshot saved: {screenshot_path}[/dim]")
         
-        return str(screenshot_path)
+        return image_url
     
-    def _resize_image(self, image_path: Path):
+    def _encode_screenshot(self, raw_bytes: bytes) -> bytes:
         """
-        Resize image to target width while maintaining aspect ratio.
-        This significantly reduces GPT-4o token cost.
+        Resize to the target width (keeping aspect ratio) and encode.
+        Smaller images significantly reduce GPT-4o token cost and upload time.
         
         Args:
-            image_path: Path to image file
+            raw_bytes: PNG screenshot
+            
+        Returns:
+            Image encoded in screenshot_format
         """
-        with Image.open(image_path) as img:
+        pil_format, _, save_options = SCREENSHOT_FORMATS[self.screenshot_format]
+        with Image.open(io.BytesIO(raw_bytes)) as img:
             if img.width > self.screenshot_width:
                 ratio = self.screenshot_width / img.width
                 new_height = int(img.height * ratio)
                 img = img.resize((self.screenshot_width, new_height), Image.Resampling.LANCZOS)
-                img.save(image_path, "JPEG", quality=85)
+            out = io.BytesIO()
+            img.convert("RGB").save(out, pil_format, **save_options)
+            return out.getvalue()
+    
+    def _page_state_key(self, page: Page) -> Optional[str]:
+        """
+        Fingerprint the current page state for the action cache.
+        
+        Combines the rendered form controls (with their filled state) and
+        buttons with everything that shapes the model's answer, so a key only
+        matches when the same decision would be made again.
+        
+        Args:
+            page: Playwright page object
+            
+        Returns:
+            Cache key, or None if the page could not be read
+        """
+        try:
+            fingerprint = page.evaluate(_PAGE_FINGERPRINT_JS)
+        except Exception:
+            return None
+        mode = "som" if self.enable_som else "standard"
+        return ResponseCache.make_key("gpt-4o-mini", mode, self.user_data_prompt, self.answers_pack, fingerprint)
     
-    def _encode_image(self, image_path: str) -> str:
+    def _cached_decision(self, page_key: str, step: int) -> Optional[dict]:
         """
-        Encode an image file to base64 string.
+        Return the remembered decision for a page state, if any.
+        
+        Each key is served once per run; if the page looks the same after the
+        cached actions ran, the model is asked instead of replaying them.
         
         Args:
-            image_path: Path to image file
+            page_key: Key from _page_state_key
+            step: Current step number for token tracking
             
         Returns:
-            Base64 encoded string
+            Parsed decision dict, or None on a miss
         """
-        with open(image_path, "rb") as f:
-            return base64.b64encode(f.read()).decode('utf-8')
+        if page_key in self._served_page_keys:
+            return None
+        cached = self.action_cache.get(page_key)  # Read errors come back as a miss
+        if not cached:
+            return None
+        try:
+            decision = json.loads(cached)
+        except ValueError:
+            console.print("[yellow]⚠ Ignoring a corrupt action cache entry[/yellow]")
+            return None
+        if not isinstance(decision, dict) or not decision:
+            return None
+        self._served_page_keys.add(page_key)
+        self.token_tracker.record_cached(step=step, action_type="analyze")
+        console.print("[dim]Page state seen before: reusing its successful actions[/dim]")
+        return decision
     
-    def _analyze_page(self, screenshot_path: str, element_marker: Optional[ElementMarker] = None, step: int = 0) -> dict:
+    def _analyze_page(self, image_url: str, element_marker: Optional[ElementMarker] = None, step: int = 0) -> dict:
         """
         Send screenshot to GPT-4o-mini for analysis.
         
         Args:
-            screenshot_path: Path to current screenshot
+            image_url: Current screenshot as a data: URL (see _capture_screenshot)
             element_marker: Optional ElementMarker if SOM is enabled
             step: Current step number for token tracking
             
         Returns:
             Parsed JSON response with action recommendation
         """
-        base64_image = self._encode_image(screenshot_path)
+        # In tool mode the model fetches user data on demand instead
+        user_data_prompt = TOOLS_USER_DATA_NOTE if self.use_tools else self.user_data_prompt
         
         # Choose prompt based on whether Set-of-Mark is enabled
         if self.enable_som and element_marker and element_marker.markers:
-            analysis_prompt = get_som_analysis_prompt(self.user_data_prompt, self.action_history)
+            system_prompt = SOM_ANALYSIS_SYSTEM_PROMPT
+            analysis_prompt = get_som_analysis_prompt(user_data_prompt)
         else:
-            analysis_prompt = get_analysis_prompt(self.user_data_prompt, self.action_history)
-        
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[bold blue]Analyzing page with GPT-4o-mini...[/bold blue]"),
-            console=console,
-            transient=True
-        ) as progress:
-            progress.add_task("Analyzing", total=None)
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
+            system_prompt = ANALYSIS_SYSTEM_PROMPT
+            analysis_prompt = get_analysis_prompt(user_data_prompt)
+        if self.answers_pack and not self.use_tools:
+            system_prompt = f"{system_prompt}\n{self.answers_pack}"
+        
+        # Only actions recorded since the previous turn (prefill entries are step 0)
+        new_actions = [entry for entry in self.action_history if entry.get('step', 0) >= self._last_turn_step]
+        turn_prompt = get_turn_prompt(new_actions)
+        
+        messages = [
+            # Static instructions: identical on every step, so the prefix is cached
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": analysis_prompt},
+            # Earlier turns (text only; their screenshots are not re-sent)
+            *self.conversation,
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": turn_prompt},
                     {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": analysis_prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
-                                    "detail": "high"  # Use high detail for form analysis
-                                }
-                            }
-                        ]
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_url,
+                            "detail": self.image_detail
+                        }
                     }
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=1000
+                ]
+            }
+        ]
+        request = {"tools": USER_DATA_TOOLS} if self.use_tools else {}
+        
+        # Identical request seen before (replays, retries): reuse its response
+        cache_key = None
+        response_text = None
+        if self.response_cache:
+            cache_key = self.response_cache.make_key(
+                "gpt-4o-mini", system_prompt, analysis_prompt,
+                *(turn["content"] for turn in self.conversation), turn_prompt, self.image_detail, image_url
             )
+            response_text = self.response_cache.get(cache_key)
         
-        # Record token usage
-        self.token_tracker.record(response, step=step, action_type="analyze")
+        if response_text is not None:
+            self.token_tracker.record_cached(step=step, action_type="analyze")
+            console.print("[dim]Using cached analysis response[/dim]")
+        else:
+            response_text = self._request_analysis(messages, request, step)
         
-        response_text = response.choices[0].message.content
-        result = extract_json_from_response(response_text)
+        # JSON mode guarantees a bare object; the lenient extractor only
+        # rescues the odd malformed reply
+        try:
+            result = json.loads(response_text)
+        except (TypeError, json.JSONDecodeError):
+            result = extract_json_from_response(response_text or "")
         
-        if not result:
+        if not isinstance(result, dict):
             console.print(f"[red]✗ Failed to parse GPT response: {response_text}[/red]")
             return {"status": "error", "reasoning": "Failed to parse AI response"}
         
+        if cache_key:
+            self.response_cache.put(cache_key, response_text)
+        
+        # Keep this turn for the next request; oldest turns drop off the window
+        self.conversation.extend((
+            {"role": "user", "content": turn_prompt},
+            {"role": "assistant", "content": response_text},
+        ))
+        del self.conversation[:-2 * MAX_CONVERSATION_TURNS]
+        self._last_turn_step = step
+        
         return result
     
+    def _request_analysis(self, messages: list, request: dict, step: int) -> str:
+        """
+        Call the model, answering user data tool calls until it replies.
+        
+        Args:
+            messages: Chat messages (tool results are appended in place)
+            request: Extra create() arguments (tools in tool mode)
+            step: Current step number for token tracking
+            
+        Returns:
+            Final response text
+        """
+        # Rich allows one live display at a time, so concurrent agents run without a spinner
+        if self.show_progress:
+            from rich.progress import Progress, SpinnerColumn, TextColumn
+            spinner = Progress(
+                SpinnerColumn(),
+                TextColumn("[bold blue]Analyzing page with GPT-4o-mini...[/bold blue]"),
+                console=get_console(),
+                transient=True,
+                refresh_per_second=4  # A spinner needs no 10Hz repaint
+            )
+        else:
+            spinner = contextlib.nullcontext()
+        
+        with spinner as progress:
+            if progress is not None:
+                progress.add_task("Analyzing", total=None)
+            
+            for tool_round in range(MAX_TOOL_ROUNDS + 1):
+                if tool_round == MAX_TOOL_ROUNDS and request.get("tools"):
+                    # Out of lookups: keep the tools declared (the history holds
+                    # tool calls and results) but force a final answer
+                    request = {**request, "tool_choice": "none"}
+                response = self._create_completion(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    max_tokens=ANALYSIS_MAX_TOKENS,
+                    **request
+                )
+                message = response.choices[0].message
+                if not message.tool_calls:
+                    break
+                
+                self.token_tracker.record(response, step=step, action_type="lookup")
+                messages.append(message)
+                for call in message.tool_calls:
+                    try:
+                        arguments = json.loads(call.function.arguments or "{}")
+                    except json.JSONDecodeError:
+                        arguments = {}
+                    messages.append({
+                        "role": "tool",
+                        "tool_call_id": call.id,
+                        "content": lookup_user_data(self.user_data, call.function.name, arguments),
+                    })
+        
+        # Record token usage
+        self.token_tracker.record(response, step=step, action_type="analyze")
+        
+        return response.choices[0].message.content
+    
+    def _create_completion(self, **kwargs):
+        """
+        Call chat.completions.create, retrying transient failures.
+        
+        Rate limits, timeouts, connection and server errors are retried up to
+        MAX_API_ATTEMPTS times with jittered exponential backoff; anything else
+        (or the last failure) is raised.
+        
+        Args:
+            **kwargs: chat.completions.create arguments
+            
+        Returns:
+            ChatCompletion response
+        """
+        for attempt in range(1, MAX_API_ATTEMPTS + 1):
+            try:
+                # Shared across concurrent agents to cap in-flight API requests
+                # (released while backing off)
+                with self.request_slots or contextlib.nullcontext():
+                    return self.client.chat.completions.create(**kwargs)
+            except RETRYABLE_API_ERRORS as e:
+                if attempt == MAX_API_ATTEMPTS:
+                    raise
+                delay = random.uniform(1.0, min(MAX_API_BACKOFF_SECONDS, 2.0 ** attempt))
+                console.print(
+                    f"[yellow]⚠ OpenAI request failed ({type(e).__name__}), "
+                    f"retrying in {delay:.1f}s ({attempt}/{MAX_API_ATTEMPTS - 1})[/yellow]"
+                )
+                time.sleep(delay)
+    
     def _execute_action(self, page: Page, command: dict, element_marker: Optional[ElementMarker] = None) -> bool:
         """
         Execute an action on the page based on GPT-4o-mini's recommendation.
@@ -412,533 +782,84 @@ class VisionAgent:
             return False
 
     
-    def _execute_standard_action(self, page: Page, action: dict) -> bool:
+    def _execute_actions(self, page: Page, decision: dict, element_marker: Optional[ElementMarker], step: int):
         """
-        Execute action using standard Playwright locators.
+        Execute the ordered actions of one analysis and record them in the history.
+        
+        The list is cut after the first page-changing action (click, upload,
+        scroll, wait), since later entries refer to the old screenshot. Field
+        actions go through FormController.execute_batch; in Set-of-Mark mode they
+        run one by one and stop at the first failure.
         
         Args:
             page: Playwright page object
-            action: Action dictionary
-            
-        Returns:
-            True if successful
+            decision: Parsed analysis response ("actions" list or a single "action")
+            element_marker: Optional ElementMarker for SOM-based targeting
+            step: Current step number for the action history
         """
-        action_type = action.get('type', '')
-        target_label = action.get('target_label', '')
-        value = action.get('value', '')
-        
-        if action_type == 'fill':
-            # Check if this is a cover letter field and we have cover letter text
-            if 'cover' in target_label.lower() and 'letter' in target_label.lower():
-                if self.cover_letter_text:
-                    value = self.cover_letter_text
-                    console.print("[dim]Using loaded cover letter text[/dim]")
-            
-            # Try multiple locator strategies (including textarea for cover letters)
-            target_lower = target_label.lower().replace(" ", "")
-            locators = [
-                # Standard textbox role
-                page.get_by_role("textbox", name=target_label),
-                # By label
-                page.get_by_label(target_label),
-                # By placeholder
-                page.get_by_placeholder(target_label),
-                # Textarea elements (common for cover letters)
-                page.locator(f'textarea[name*="{target_lower}"]'),
-                page.locator(f'textarea[id*="{target_lower}"]'),
-                page.locator(f'textarea[aria-label*="{target_label}"]'),
-                # Any textarea near a label containing the text
-                page.locator(f'label:has-text("{target_label}") + textarea'),
-                page.locator(f'label:has-text("{target_label}") ~ textarea'),
-                # Input elements
-                page.locator(f'input[name*="{target_lower}"]'),
-                page.locator(f'input[id*="{target_lower}"]'),
-                # Generic textarea if looking for cover letter
-                page.locator('textarea[name*="cover"]') if 'cover' in target_lower else None,
-                page.locator('textarea#cover_letter') if 'cover' in target_lower else None,
-                page.locator('textarea[data-field*="cover"]') if 'cover' in target_lower else None,
-            ]
-            
-            # Filter out None entries
-            locators = [loc for loc in locators if loc is not None]
-            
-            for locator in locators:
-                try:
-                    if locator.count() > 0:
-                        # Scroll into view first
-                        scroll_element_into_view(page, locator)
-                        if locator.first.is_visible():
-                            locator.first.fill(value)
-                            console.print(f"[green]✓ Filled '{target_label}' with value[/green]")
-                            return True
-                except Exception:
-                    continue
-            
-            # Scroll down and retry if elements weren't found
-            console.print("[dim]Element not found, scrolling down to search...[/dim]")
-            page.mouse.wheel(0, 400)
-            time.sleep(0.5)
-            
-            for locator in locators:
-                try:
-                    if locator.count() > 0:
-                        scroll_element_into_view(page, locator)
-                        if locator.first.is_visible():
-                            locator.first.fill(value)
-                            console.print(f"[green]✓ Filled '{target_label}' after scroll[/green]")
-                            return True
-                except Exception:
-                    continue
-            
-            # Last resort: try any visible textarea on the page
-            if 'cover' in target_label.lower() or 'letter' in target_label.lower():
-                try:
-                    textareas = page.locator('textarea:visible')
-                    if textareas.count() > 0:
-                        textareas.first.fill(value)
-                        console.print(f"[green]✓ Filled textarea with cover letter[/green]")
-                        return True
-                except Exception:
-                    pass
-            
-            console.print(f"[yellow]⚠ Could not find input: {target_label}[/yellow]")
-            return False
-        
-        elif action_type == 'click':
-            locators = [
-                page.get_by_role("button", name=target_label),
-                page.get_by_role("link", name=target_label),
-                page.get_by_text(target_label, exact=True),
-                page.get_by_text(target_label),
-                page.locator(f'[aria-label="{target_label}"]'),
-                page.locator(f'button:has-text("{target_label}")'),
-                page.locator(f'a:has-text("{target_label}")'),
-            ]
-            
-            for locator in locators:
-                try:
-                    if locator.count() > 0:
-                        # Scroll into view first
-                        scroll_element_into_view(page, locator)
-                        if locator.first.is_visible():
-                            # Try force click for better reliability
-                            locator.first.click(force=True)
-                            console.print(f"[green]✓ Clicked '{target_label}'[/green]")
-                            return True
-                except Exception:
-                    continue
-            
-            # Scroll down and retry
-            page.mouse.wheel(0, 400)
-            time.sleep(0.5)
-            
-            for locator in locators:
-                try:
-                    if locator.count() > 0:
-                        scroll_element_into_view(page, locator)
-                        if locator.first.is_visible():
-                            locator.first.click(force=True)
-                            console.print(f"[green]✓ Clicked '{target_label}' after scroll[/green]")
-                            return True
-                except Exception:
-                    continue
-            
-            # JavaScript fallback
-            try:
-                js_result = page.evaluate(f'''
-                    () => {{
-                        const elements = document.querySelectorAll('button, a, [role="button"], input[type="submit"]');
-                        for (const el of elements) {{
-                            if (el.textContent.toLowerCase().includes("{target_label.lower()}") ||
-                                el.getAttribute('aria-label')?.toLowerCase().includes("{target_label.lower()}")) {{
-                                el.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
-                                el.click();
-                                return true;
-                            }}
-                        }}
-                        return false;
-                    }}
-                ''')
-                if js_result:
-                    console.print(f"[green]✓ Clicked '{target_label}' (JS fallback)[/green]")
-                    return True
-            except Exception:
-                pass
-            
-            console.print(f"[yellow]⚠ Could not find button/link: {target_label}[/yellow]")
-            return False
-        
-        elif action_type == 'select':
-            # First, try native <select> elements
-            native_select_locators = [
-                page.locator(f'select[name*="{target_label.lower().replace(" ", "")}"]'),
-                page.locator(f'select[id*="{target_label.lower().replace(" ", "")}"]'),
-                page.get_by_label(target_label).locator('select'),
-            ]
-            
-            for locator in native_select_locators:
-                try:
-                    if locator.count() > 0:
-                        scroll_element_into_view(page, locator)
-                        if locator.first.is_visible():
-                            locator.first.select_option(label=value)
-                            console.print(f"[green]✓ Selected '{value}' in native dropdown '{target_label}'[/green]")
-                            return True
-                except Exception:
-                    continue
-            
-            # Handle custom dropdown components (click to open, then click option)
-            console.print(f"[dim]Trying custom dropdown for '{target_label}'...[/dim]")
-            
-            # Step 1: Click on the dropdown trigger to open it
-            dropdown_triggers = [
-                page.get_by_role("combobox", name=target_label),
-                page.get_by_label(target_label),
-                page.locator(f'[aria-label*="{target_label}"]'),
-                page.locator(f'[data-testid*="{target_label.lower().replace(" ", "")}"]'),
-                # Common custom dropdown patterns
-                page.locator(f'div:has-text("{target_label}") >> button'),
-                page.locator(f'div:has-text("{target_label}") >> [role="button"]'),
-                page.locator(f'label:has-text("{target_label}") + div'),
-                page.locator(f'label:has-text("{target_label}") ~ div >> button'),
-                page.locator(f'label:has-text("{target_label}") ~ div [role="combobox"]'),
-                page.locator(f'label:has-text("{target_label}") ~ div'),
-                # Clickable divs that might be dropdowns
-                page.locator(f'[class*="select"]:has-text("{target_label}")'),
-                page.locator(f'[class*="dropdown"]:has-text("{target_label}")'),
-            ]
-            
-            dropdown_opened = False
-            for trigger in dropdown_triggers:
-                try:
-                    if trigger.count() > 0:
-                        scroll_element_into_view(page, trigger)
-                        if trigger.first.is_visible():
-                            trigger.first.click(force=True)
-                            time.sleep(0.5)  # Wait for dropdown animation
-                            dropdown_opened = True
-                            console.print(f"[dim]Opened dropdown '{target_label}'[/dim]")
-                            break
-                except Exception:
-                    continue
-            
-            if not dropdown_opened:
-                # Try scrolling down first then retry
-                page.mouse.wheel(0, 300)
-                time.sleep(0.3)
-                for trigger in dropdown_triggers:
-                    try:
-                        if trigger.count() > 0:
-                            scroll_element_into_view(page, trigger)
-                            if trigger.first.is_visible():
-                                trigger.first.click(force=True)
-                                time.sleep(0.5)
-                                dropdown_opened = True
-                                console.print(f"[dim]Opened dropdown '{target_label}' after scroll[/dim]")
-                                break
-                    except Exception:
-                        continue
-            
-            if not dropdown_opened:
-                console.print(f"[yellow]⚠ Could not open dropdown: {target_label}[/yellow]")
-                # Still try to find and click the option directly
-            
-            # Step 2: Click on the option value
-            time.sleep(0.3)  # Brief wait for options to render
-            
-            option_locators = [
-                # Exact match first
-                page.get_by_role("option", name=value),
-                page.get_by_role("menuitem", name=value),
-                page.get_by_role("listitem").filter(has_text=value),
-                page.locator(f'[role="option"]:has-text("{value}")'),
-                page.locator(f'[role="menuitem"]:has-text("{value}")'),
-                page.locator(f'li:has-text("{value}")'),
-                # Try with data attributes
-                page.locator(f'[data-value="{value}"]'),
-                page.locator(f'[data-value="{value.lower()}"]'),
-                # Dropdown options in various formats
-                page.locator(f'div[role="listbox"] >> text="{value}"'),
-                page.locator(f'ul >> li:has-text("{value}")'),
-                # Loose text match as last resort
-                page.get_by_text(value, exact=True),
-            ]
-            
-            for option in option_locators:
-                try:
-                    if option.count() > 0 and option.first.is_visible():
-                        option.first.click(force=True)
-                        time.sleep(0.2)
-                        console.print(f"[green]✓ Selected '{value}' in custom dropdown '{target_label}'[/green]")
-                        return True
-                except Exception:
-                    continue
-            
-            # Final fallback: try clicking anywhere that contains the value text
-            try:
-                visible_options = page.locator(f':visible:has-text("{value}")')
-                if visible_options.count() > 0:
-                    # Click the last visible one (often the dropdown option, not the label)
-                    visible_options.last.click()
-                    console.print(f"[green]✓ Clicked option containing '{value}'[/green]")
-                    return True
-            except Exception:
-                pass
-            
-            console.print(f"[yellow]⚠ Could not select option '{value}' in '{target_label}'[/yellow]")
-            return False
+        actions = decision.get('actions')
+        if not isinstance(actions, list):
+            actions = [decision.get('action', {})]
+        actions = [action for action in actions if isinstance(action, dict)] or [{}]
         
-        elif action_type == 'check':
-            # Handle checkbox selections
-            target_lower = target_label.lower().replace(" ", "")
-            
-            checkbox_locators = [
-                page.get_by_role("checkbox", name=target_label),
-                page.get_by_label(target_label, exact=False),
-                page.locator(f'input[type="checkbox"][name*="{target_lower}"]'),
-                page.locator(f'input[type="checkbox"][id*="{target_lower}"]'),
-                page.locator(f'label:has-text("{target_label}") input[type="checkbox"]'),
-                page.locator(f'label:has-text("{target_label}")'),
-                page.locator(f'[role="checkbox"]:has-text("{target_label}")'),
-                page.locator(f'div:has-text("{target_label}") input[type="checkbox"]'),
-            ]
-            
-            for locator in checkbox_locators:
-                try:
-                    if locator.count() > 0:
-                        # Scroll into view first
-                        scroll_element_into_view(page, locator)
-                        if locator.first.is_visible():
-                            element = locator.first
-                            # Try force click first (works better with custom UIs)
-                        try:
-                            element.click(force=True)
-                            time.sleep(0.2)
-                            console.print(f"[green]✓ Checked '{target_label}' (force click)[/green]")
-                            return True
-                        except Exception:
-                            pass
-                        # Try regular check
-                        try:
-                            if not element.is_checked():
-                                element.check(force=True)
-                            console.print(f"[green]✓ Checked '{target_label}'[/green]")
-                            return True
-                        except Exception:
-                            pass
-                except Exception:
-                    continue
-            
-            # JavaScript fallback for custom checkboxes
-            try:
-                js_result = page.evaluate(f'''
-                    () => {{
-                        const labels = document.querySelectorAll('label');
-                        for (const label of labels) {{
-                            if (label.textContent.toLowerCase().includes("{target_label.lower()}")) {{
-                                const checkbox = label.querySelector('input[type="checkbox"]') || 
-                                                label.previousElementSibling || 
-                                                label.nextElementSibling ||
-                                                document.getElementById(label.getAttribute('for'));
-                                if (checkbox) {{
-                                    checkbox.click();
-                                    return true;
-                                }}
-                                label.click();
-                                return true;
-                            }}
-                        }}
-                        // Try clicking any element with the text
-                        const el = document.evaluate('//*[contains(text(), "{target_label}")]', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
-                        if (el) {{
-                            el.click();
-                            return true;
-                        }}
-                        return false;
-                    }}
-                ''')
-                if js_result:
-                    console.print(f"[green]✓ Checked '{target_label}' (JS fallback)[/green]")
-                    return True
-            except Exception as e:
-                console.print(f"[dim]JS checkbox fallback failed: {e}[/dim]")
-            
-            console.print(f"[yellow]⚠ Could not check: {target_label}[/yellow]")
-            return False
+        for cut, action in enumerate(actions):
+            if is_page_changing(action):
+                actions = actions[:cut + 1]
+                break
         
-        elif action_type == 'radio':
-            # Handle radio button selections (like "How did you hear about us?")
-            # The value contains the option text to select
-            
-            radio_locators = [
-                # Try by radio role with the option name
-                page.get_by_role("radio", name=value),
-                # Try by label matching the value
-                page.get_by_label(value, exact=True),
-                page.get_by_label(value, exact=False),
-                # Try radio input with value attribute
-                page.locator(f'input[type="radio"][value="{value}"]'),
-                page.locator(f'input[type="radio"][value="{value.lower()}"]'),
-                page.locator(f'input[type="radio"][value*="{value.lower().replace(" ", "")}"]'),
-                # Try by text near the radio button
-                page.locator(f'label:has-text("{value}") input[type="radio"]'),
-                page.locator(f'label:has-text("{value}")'),
-                # Custom radio UIs
-                page.locator(f'[role="radio"]:has-text("{value}")'),
-                page.locator(f'div:has-text("{value}") >> input[type="radio"]'),
-                page.locator(f'span:has-text("{value}")'),
-            ]
-            
-            for locator in radio_locators:
-                try:
-                    if locator.count() > 0:
-                        # Scroll into view first
-                        scroll_element_into_view(page, locator)
-                        if locator.first.is_visible():
-                            element = locator.first
-                            # Try force click (works better with custom UIs)
-                            try:
-                                element.click(force=True)
-                                time.sleep(0.2)
-                                console.print(f"[green]✓ Selected radio option '{value}' (force click)[/green]")
-                                return True
-                            except Exception:
-                                pass
-                            # Regular click
-                            try:
-                                element.click()
-                                console.print(f"[green]✓ Selected radio option '{value}'[/green]")
-                                return True
-                            except Exception:
-                                pass
-                except Exception:
-                    continue
-            
-            # Try clicking the text directly with force
-            try:
-                option_text = page.get_by_text(value, exact=True)
-                if option_text.count() > 0:
-                    option_text.first.click(force=True)
-                    time.sleep(0.2)
-                    console.print(f"[green]✓ Clicked radio option text '{value}'[/green]")
-                    return True
-            except Exception:
-                pass
-            
-            # Try partial match with force click
-            try:
-                option_text = page.get_by_text(value, exact=False)
-                if option_text.count() > 0:
-                    for i in range(min(5, option_text.count())):
-                        try:
-                            if option_text.nth(i).is_visible():
-                                option_text.nth(i).click(force=True)
-                                time.sleep(0.2)
-                                console.print(f"[green]✓ Clicked radio option '{value}'[/green]")
-                                return True
-                        except Exception:
-                            continue
-            except Exception:
-                pass
-            
-            # JavaScript fallback for custom radio buttons
+        if self.enable_som and element_marker:
+            results = []
+            for action in actions:
+                results.append(self._execute_action(page, {'action': action}, element_marker))
+                if not results[-1]:
+                    break
+        else:
+            for action in actions:
+                print_action_summary(action)
             try:
-                js_result = page.evaluate(f'''
-                    () => {{
-                        // Find by label text
-                        const labels = document.querySelectorAll('label, span, div');
-                        for (const label of labels) {{
-                            const text = label.textContent.trim().toLowerCase();
-                            if (text === "{value.lower()}" || text.includes("{value.lower()}")) {{
-                                // Try to find associated radio input
-                                const radio = label.querySelector('input[type="radio"]') ||
-                                             label.previousElementSibling ||
-                                             label.parentElement.querySelector('input[type="radio"]');
-                                if (radio && radio.type === 'radio') {{
-                                    radio.click();
-                                    return true;
-                                }}
-                                // Click the label itself
-                                label.click();
-                                return true;
-                            }}
-                        }}
-                        // Try role="radio"
-                        const radios = document.querySelectorAll('[role="radio"]');
-                        for (const radio of radios) {{
-                            if (radio.textContent.toLowerCase().includes("{value.lower()}")) {{
-                                radio.click();
-                                return true;
-                            }}
-                        }}
-                        return false;
-                    }}
-                ''')
-                if js_result:
-                    console.print(f"[green]✓ Selected radio option '{value}' (JS fallback)[/green]")
-                    return True
+                results = self.form_controller.execute_batch(actions)
             except Exception as e:
-                console.print(f"[dim]JS radio fallback failed: {e}[/dim]")
-            
-            console.print(f"[yellow]⚠ Could not find radio option: {value}[/yellow]")
-            return False
+                console.print(f"[red]✗ Action failed: {e}[/red]")
+                results = [False] * len(actions)
         
-        elif action_type == 'upload_resume':
-            try:
-                file_input = page.locator('input[type="file"]')
-                if file_input.count() > 0:
-                    file_input.first.set_input_files(str(self.resume_path))
-                    console.print(f"[green]✓ Uploaded resume: {self.resume_path.name}[/green]")
-                    return True
-            except Exception as e:
-                console.print(f"[red]✗ Failed to upload resume: {e}[/red]")
-            return False
+        # Track actions for history (skipped ones after a SOM failure are left out)
+        for action, success in zip(actions, results):
+            self.action_history.append({
+                'step': step,
+                'type': action.get('type'),
+                'target': action.get('target_label', action.get('element_id')),
+                'success': success
+            })
         
-        elif action_type == 'upload_cover_letter':
-            if not self.cover_letter_path or not self.cover_letter_path.exists():
-                console.print("[yellow]⚠ Cover letter file not found[/yellow]")
-                return False
+        # Remember fully successful decisions for this page state
+        if self._pending_page_entry and len(results) == len(actions) and all(results):
+            page_key, decision = self._pending_page_entry
             try:
-                # Look for file input near cover letter label/section
-                file_inputs = page.locator('input[type="file"]')
-                count = file_inputs.count()
-                
-                if count == 0:
-                    console.print("[yellow]⚠ No file input found for cover letter[/yellow]")
-                    return False
-                
-                # If there are multiple file inputs, try to find the one for cover letter
-                # Usually resume is first, cover letter is second
-                if count >= 2:
-                    file_inputs.nth(1).set_input_files(str(self.cover_letter_path))
-                else:
-                    # Try the first one if only one exists
-                    file_inputs.first.set_input_files(str(self.cover_letter_path))
-                
-                console.print(f"[green]✓ Uploaded cover letter: {self.cover_letter_path.name}[/green]")
-                return True
-            except Exception as e:
-                console.print(f"[red]✗ Failed to upload cover letter: {e}[/red]")
-            return False
-        
-        elif action_type == 'scroll_down':
-            page.mouse.wheel(0, 500)
-            console.print("[green]✓ Scrolled down[/green]")
-            return True
-        
-        elif action_type == 'scroll_up':
-            page.mouse.wheel(0, -500)
-            console.print("[green]✓ Scrolled up[/green]")
-            return True
+                # Write errors are logged and skipped by the cache itself
+                self.action_cache.put(page_key, json.dumps(decision, ensure_ascii=False))
+            except (TypeError, ValueError) as e:
+                console.print(f"[yellow]⚠ Could not cache actions for this page: {e}[/yellow]")
+        self._pending_page_entry = None
+    
+    def _wait_for_page_settle(self, page: Page, max_seconds: float):
+        """
+        Wait for the page to finish loading after an action, at most max_seconds.
         
-        elif action_type == 'wait':
-            time.sleep(2)
-            console.print("[green]✓ Waited[/green]")
-            return True
+        Load states already reached return immediately, so fast pages move on
+        at once instead of sleeping a fixed delay.
         
-        else:
-            console.print(f"[yellow]⚠ Unknown action type: {action_type}[/yellow]")
-            return False
+        Args:
+            page: Playwright page object
+            max_seconds: Upper bound for each wait
+        """
+        timeout_ms = max(int(max_seconds * 1000), 1)
+        try:
+            page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+            page.wait_for_load_state("networkidle", timeout=timeout_ms)
+        except Exception:
+            pass
+        # Short grace period for client-side re-renders triggered by the action
+        page.wait_for_timeout(min(200, timeout_ms))
     
     def _detect_loop(self) -> tuple[bool, str]:
         """
@@ -1014,7 +935,11 @@ class VisionAgent:
                 # Navigate to the job application
                 console.print(f"[bold]Navigating to application...[/bold]")
                 page.goto(url, wait_until='networkidle', timeout=30000)
-                time.sleep(2)  # Wait for dynamic content
+                # Wait for dynamic content: the first rendered form control
+                try:
+                    page.locator(_FORM_CONTROL_SELECTOR).first.wait_for(state="visible", timeout=2000)
+                except Exception:
+                    pass
                 
                 # Close cookie/privacy popups that might hide the form
                 self._dismiss_popups(page)
@@ -1024,7 +949,8 @@ class VisionAgent:
                     page=page,
                     resume_path=self.resume_path,
                     cover_letter_path=self.cover_letter_path,
-                    cover_letter_text=self.cover_letter_text
+                    cover_letter_text=self.cover_letter_text,
+                    verbose=self.verbose
                 )
                 
                 # Try deterministic autofill to reduce GPT calls
@@ -1032,7 +958,7 @@ class VisionAgent:
                 uploads = self._quick_file_uploads()
                 if prefilled or uploads:
                     console.print(f"[dim]Autofill kickstart: fields={prefilled}, uploads={uploads}[/dim]")
-                time.sleep(0.5)
+                    self._wait_for_page_settle(page, 0.5)
                 
                 step = 0
                 while step < self.max_steps:
@@ -1043,14 +969,18 @@ class VisionAgent:
                     if self.enable_som and element_marker:
                         element_marker.inject_markers()
                     
-                    screenshot_path = self._capture_screenshot(page)
-                    console.print(f"[dim]Screenshot saved: {screenshot_path}[/dim]")
+                    screenshot = self._capture_screenshot(page)
                     
                     # Remove markers before analysis if we want clean screenshots
                     # (keeping them for now as they help AI identify elements)
                     
-                    # THINK: Analyze with GPT-4o-mini
-                    decision = self._analyze_page(screenshot_path, element_marker, step=step)
+                    # THINK: Reuse the actions that worked on this exact page state
+                    # before, otherwise analyze with GPT-4o-mini
+                    page_key = self._page_state_key(page) if self.action_cache else None
+                    decision = self._cached_decision(page_key, step) if page_key else None
+                    if decision is None:
+                        decision = self._analyze_page(screenshot, element_marker, step=step)
+                        self._pending_page_entry = (page_key, decision) if page_key else None
                     
                     # Show status
                     print_status_panel(
@@ -1067,7 +997,7 @@ class VisionAgent:
                     if decision.get('status') == 'completed':
                         console.print("\n[bold green]✅ Application submitted successfully![/bold green]")
                         # Capture final screenshot as proof
-                        self._capture_screenshot(page, "final_confirmation.jpg")
+                        self._capture_screenshot(page, "final_confirmation", save=True)
                         # Print token usage summary
                         self.token_tracker.print_summary()
                         return True
@@ -1077,17 +1007,8 @@ class VisionAgent:
                         console.print(f"\n[bold red]❌ Agent encountered an error: {decision.get('reasoning')}[/bold red]")
                         return False
                     
-                    # ACT: Execute the recommended action
-                    action = decision.get('action', {})
-                    success = self._execute_action(page, decision, element_marker)
-                    
-                    # Track action for history
-                    self.action_history.append({
-                        'step': step,
-                        'type': action.get('type'),
-                        'target': action.get('target_label', action.get('element_id')),
-                        'success': success
-                    })
+                    # ACT: Execute the recommended actions (all visible fields at once)
+                    self._execute_actions(page, decision, element_marker, step)
                     
                     # Detect loops and try to break out
                     is_looping, scroll_direction = self._detect_loop()
@@ -1097,13 +1018,12 @@ class VisionAgent:
                             page.mouse.wheel(0, -500)
                         else:
                             page.mouse.wheel(0, 500)
-                        time.sleep(0.5)
                         # Clear some history to prevent immediate re-detection
                         if len(self.action_history) > 5:
                             self.action_history = self.action_history[-3:]
                     
-                    # Wait before next action
-                    time.sleep(self.action_delay)
+                    # Wait for the page to settle (returns early on fast pages)
+                    self._wait_for_page_settle(page, self.action_delay)
                 
                 console.print(f"\n[bold yellow]⚠ Reached maximum steps ({self.max_steps})[/bold yellow]")
                 # Print token usage even on timeout
@@ -1120,9 +1040,14 @@ class VisionAgent:
             
             finally:
                 # Cleanup
-                cleanup_screenshots(self.screenshots_dir, keep_last=10)
+                if self.keep_screenshots is not None:
+                    cleanup_screenshots(self.screenshots_dir, keep_last=self.keep_screenshots)
                 console.print("[dim]Closing browser...[/dim]")
                 browser.close()
+                if self.response_cache:
+                    self.response_cache.close()
+                if self.action_cache:
+                    self.action_cache.close()
     
     def generate_answer(self, question: str) -> str:
         """
@@ -1136,7 +1061,7 @@ class VisionAgent:
         """
         prompt = get_answer_generation_prompt(question, self.user_data)
         
-        response = self.client.chat.completions.create(
+        response = self._create_completion(
             model="gpt-4o-mini",  # Use cheaper model for text generation
             messages=[
                 {"role": "system", "content": "You are a professional job application assistant. Generate concise, relevant answers."},
@@ -1146,3 +1071,64 @@ class VisionAgent:
         )
         
         return response.choices[0].message.content.strip()
+    
+    def close(self):
+        """Release the agent's OpenAI connection pool (a shared client is left open)."""
+        if self._owns_http_client:
+            self._http_client.close()
+
+
+def run_agents(urls: List[str], concurrency: int = 2, max_requests: int = None, **agent_kwargs) -> Dict[str, bool]:
+    """
+    Fill several applications concurrently, one agent and browser per URL.
+    
+    The sync Playwright API is bound to the thread that started it, so each job
+    runs in its own worker thread with its own Playwright instance and browser;
+    the waits on GPT responses of different jobs then overlap.
+    
+    Args:
+        urls: Application URLs to fill (duplicates are filled once)
+        concurrency: Applications (browsers) running at the same time
+        max_requests: In-flight OpenAI requests across all agents
+            (defaults to concurrency)
+        **agent_kwargs: VisionAgent constructor arguments shared by every job
+        
+    Returns:
+        Mapping of URL to whether the application was submitted
+    """
+    urls = list(dict.fromkeys(urls))
+    concurrency = max(1, concurrency)
+    request_slots = threading.Semaphore(max(1, max_requests or concurrency))
+    # One connection pool for every job's OpenAI requests
+    http_client = make_http_client()
+    
+    # Separate screenshot folders, so jobs never overwrite or clean up each
+    # other's files (every job saves a "final_confirmation")
+    base_dir = Path(agent_kwargs.pop('screenshots_dir', None) or DEFAULT_SCREENSHOTS_DIR)
+    job_dirs = [base_dir / _job_slug(index, url) for index, url in enumerate(urls, 1)]
+    
+    def run_one(url: str, screenshots_dir: Path) -> bool:
+        # Built in the worker thread: the agent's resources stay on its thread
+        try:
+            agent = VisionAgent(
+                **agent_kwargs, request_slots=request_slots, show_progress=False, http_client=http_client,
+                screenshots_dir=screenshots_dir, keep_screenshots=None
+            )
+            return agent.run(url)
+        except Exception as e:
+            console.print(f"[red]✗ {url}: {e}[/red]")
+            return False
+    
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return dict(zip(urls, pool.map(run_one, urls, job_dirs)))
+    finally:
+        http_client.close()
+        for job_dir in job_dirs:
+            cleanup_screenshots(job_dir, keep_last=10)
+
+
+def _job_slug(index: int, url: str) -> str:
+    """Folder name for one job's screenshots: its position plus a readable URL slug."""
+    slug = re.sub(r'[^a-z0-9]+', '-', re.sub(r'^https?://', '', url.lower())).strip('-')
+    return f"{index:02d}-{slug[:60] or 'job'}"